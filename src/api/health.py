@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse
+
+from services.warmup import CacheWarmer, get_cache_warmer
+
+health = APIRouter()
+
+
+@health.get('/ready', include_in_schema=False)
+async def get_readiness(warmer: CacheWarmer = Depends(get_cache_warmer)) -> ORJSONResponse:
+    """Готовность принимать трафик: приложение запущено и прогрев кэша завершён"""
+    return ORJSONResponse({'ready': warmer.ready}, status_code=200 if warmer.ready else 503)
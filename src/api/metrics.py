@@ -0,0 +1,74 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+from prometheus_client import CONTENT_TYPE_LATEST
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import metrics
+from core.config import envs
+
+
+class MetricsMiddleware:
+    """
+    Время обработки запросов по шаблонам роутов (а не по фактическим путям, чтобы идентификаторы объектов
+    не порождали новые серии метрик) и количество запросов в обработке
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        in_progress = metrics.REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            # шаблон роута становится известен только после маршрутизации
+            metrics.REQUEST_LATENCY.labels(method, self._route(scope), str(status)).observe(
+                time.perf_counter() - started
+            )
+
+    def _route(self, scope: Scope) -> str:
+        route = scope.get('route')
+
+        return route.path if route is not None else 'unmatched'
+
+
+def add_metrics(app: FastAPI):
+    if not envs.metrics.enabled:
+        return
+
+    app.add_middleware(MetricsMiddleware)
+    monitor = {}
+
+    @app.on_event('startup')
+    async def start_event_loop_monitor():
+        monitor['task'] = asyncio.ensure_future(
+            metrics.monitor_event_loop_lag(envs.metrics.event_loop_interval_seconds)
+        )
+
+    @app.on_event('shutdown')
+    async def stop_event_loop_monitor():
+        if 'task' in monitor:
+            monitor['task'].cancel()
+
+    @app.get('/metrics', include_in_schema=False)
+    async def get_metrics() -> Response:
+        return Response(content=metrics.render(), headers={'Content-Type': CONTENT_TYPE_LATEST})
@@ -0,0 +1,56 @@
+import time
+
+import orjson
+from fastapi import FastAPI
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import timing
+from core.config import envs
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Заголовок Server-Timing с разбивкой времени обработки запроса (авторизация, Redis, Elasticsearch,
+    сериализация) и, при необходимости, запись той же разбивки в лог
+    """
+
+    def __init__(self, app: ASGIApp, log: bool = False):
+        self.app = app
+        self.log = log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        spans = {}
+        token = timing.start(spans)
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', timing.format_header(spans, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing.stop(token)
+
+        if self.log:
+            logger.info(orjson.dumps({
+                'method': scope['method'],
+                'path': scope['path'],
+                'total_ms': round((time.perf_counter() - started) * 1000, 2),
+                'spans': {name: round(seconds * 1000, 2) for name, (seconds, count) in spans.items()},
+            }).decode())
+
+
+def add_server_timing(app: FastAPI):
+    if envs.server_timing.enabled:
+        app.add_middleware(ServerTimingMiddleware, log=envs.server_timing.log)
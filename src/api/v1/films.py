@@ -1,13 +1,17 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
 
 from core.constants import ROLES
 from dependencies.auth import user_has_role
 from models.auth import UserInfoJWT
+from models.core import IdsBatch
 from models.films import FilmFull, FilmList, GetMultiQueryParamFilms
 from models.params import Filters, FilterValue, Search, SearchValue
 from services.films import FilmElasticService, get_film_service
+from services.response_cache import ResponseCache, get_response_cache
 
 films = APIRouter()
 
@@ -19,19 +23,23 @@ films = APIRouter()
     description='Список кинопроизведений с возможностью фильтрации'
 )
 async def get_films(
+        request: Request,
         film_service: FilmElasticService = Depends(get_film_service),
         query_params: GetMultiQueryParamFilms = Depends(),
         genre: Optional[str] = Query(None, description='Фильтрация фильмов по наименованию жанра'),
         search: Optional[str] = Query(None, description='Поиск по кинопроизведениям'),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> FilmList:
-    results, count = await film_service.get_multi(
-        query_params=query_params,
-        filters=Filters(values=[FilterValue(field='genre', value=genre)]) if genre else None,
-        search=Search(values=[SearchValue(field='title', value=search)]) if search else None
-    )
+    async def build() -> FilmList:
+        results, page_info = await film_service.get_multi(
+            query_params=query_params,
+            filters=Filters(values=[FilterValue(field='genre', value=genre)]) if genre else None,
+            search=Search(values=[SearchValue(field='title', value=search)]) if search else None
+        )
+        return FilmList(**query_params.dict(), **page_info.dict(), data=results)
 
-    return FilmList(**query_params.dict(), rows_number=count, data=results)
+    return await response_cache.get_or_build(request, build, FilmList, film_service)
 
 
 @films.get(
@@ -41,17 +49,49 @@ async def get_films(
     description='Список кинопроизведений с возможностью поиска'
 )
 async def get_films_search(
+        request: Request,
         film_service: FilmElasticService = Depends(get_film_service),
         query_params: GetMultiQueryParamFilms = Depends(),
         query: Optional[str] = Query(None, description='Поиск по кинопроизведениям'),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> FilmList:
-    results, count = await film_service.get_multi(
-        query_params=query_params,
-        search=Search(values=[SearchValue(field='title', value=query)]) if query else None
-    )
+    async def build() -> FilmList:
+        results, page_info = await film_service.get_multi(
+            query_params=query_params,
+            search=Search(values=[SearchValue(field='title', value=query)]) if query else None
+        )
+        return FilmList(**query_params.dict(), **page_info.dict(), data=results)
 
-    return FilmList(**query_params.dict(), rows_number=count, data=results)
+    return await response_cache.get_or_build(request, build, FilmList, film_service)
+
+
+@films.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Выгрузка всех кинопроизведений',
+    description='Потоковая выгрузка всех кинопроизведений в формате NDJSON (один объект на строку)',
+)
+async def export_films(
+        film_service: FilmElasticService = Depends(get_film_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> StreamingResponse:
+    return StreamingResponse(film_service.export(model=FilmFull), media_type='application/x-ndjson')
+
+
+@films.post(
+    '/batch',
+    response_model=List[FilmFull],
+    summary='Получение нескольких кинопроизведений',
+    description='Получение кинопроизведений по списку ID одним запросом (ненайденные объекты пропускаются)',
+)
+async def get_films_batch(
+        batch: IdsBatch,
+        film_service: FilmElasticService = Depends(get_film_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> List[FilmFull]:
+    results = await film_service.get_many(batch.ids, model=FilmFull)
+    return results
 
 
 @films.get(
@@ -61,10 +101,15 @@ async def get_films_search(
     description='Получение полной информации о конкретном фильме'
 )
 async def get_film(
+        request: Request,
         film_id: str = Path(...),
         film_service: FilmElasticService = Depends(get_film_service),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> Optional[FilmFull]:
-    result = await film_service.get(_id=film_id, model=FilmFull)
-
-    return result
+    return await response_cache.get_or_build(
+        request,
+        lambda: film_service.get(_id=film_id, model=FilmFull),
+        FilmFull,
+        film_service
+    )
@@ -1,14 +1,17 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
 
 from core.constants import ROLES
 from dependencies.auth import user_has_role
 from models.auth import UserInfoJWT
-from models.core import GetMultiQueryParam
+from models.core import GetMultiQueryParam, IdsBatch
 from models.genres import GenreBase, GenreList
 from models.params import Search, SearchValue
-from services.genres import GenreElasticService, get_genre_service
+from services.genres import GenreService, get_genre_service
+from services.response_cache import ResponseCache, get_response_cache
 
 genres = APIRouter()
 
@@ -20,12 +23,17 @@ genres = APIRouter()
     description='Список жанров с возможность',
 )
 async def get_genres(
-        genre_service: GenreElasticService = Depends(get_genre_service),
+        request: Request,
+        genre_service: GenreService = Depends(get_genre_service),
         query_params: GetMultiQueryParam = Depends(),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> GenreList:
-    results, count = await genre_service.get_multi(query_params=query_params)
-    return GenreList(**query_params.dict(), rows_number=count, data=results)
+    async def build() -> GenreList:
+        results, page_info = await genre_service.get_multi(query_params=query_params)
+        return GenreList(**query_params.dict(), **page_info.dict(), data=results)
+
+    return await response_cache.get_or_build(request, build, GenreList, genre_service)
 
 
 @genres.get(
@@ -35,16 +43,49 @@ async def get_genres(
     description='Список жанров с возможность поиска и сортировки',
 )
 async def get_genres_search(
-        genre_service: GenreElasticService = Depends(get_genre_service),
+        request: Request,
+        genre_service: GenreService = Depends(get_genre_service),
         query_params: GetMultiQueryParam = Depends(),
         query: Optional[str] = Query(None, description='Поиск по жанрам'),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> GenreList:
-    results, count = await genre_service.get_multi(
-        query_params=query_params,
-        search=Search(values=[SearchValue(field='name', value=query)]) if query else None
-    )
-    return GenreList(**query_params.dict(), rows_number=count, data=results)
+    async def build() -> GenreList:
+        results, page_info = await genre_service.get_multi(
+            query_params=query_params,
+            search=Search(values=[SearchValue(field='name', value=query)]) if query else None
+        )
+        return GenreList(**query_params.dict(), **page_info.dict(), data=results)
+
+    return await response_cache.get_or_build(request, build, GenreList, genre_service)
+
+
+@genres.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Выгрузка всех жанров',
+    description='Потоковая выгрузка всех жанров в формате NDJSON (один объект на строку)',
+)
+async def export_genres(
+        genre_service: GenreService = Depends(get_genre_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> StreamingResponse:
+    return StreamingResponse(genre_service.export(model=GenreBase), media_type='application/x-ndjson')
+
+
+@genres.post(
+    '/batch',
+    response_model=List[GenreBase],
+    summary='Получение нескольких жанров',
+    description='Получение жанров по списку ID одним запросом (ненайденные объекты пропускаются)',
+)
+async def get_genres_batch(
+        batch: IdsBatch,
+        genre_service: GenreService = Depends(get_genre_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> List[GenreBase]:
+    results = await genre_service.get_many(batch.ids)
+    return results
 
 
 @genres.get(
@@ -54,9 +95,15 @@ async def get_genres_search(
     description='Получить жанр по его ID',
 )
 async def get_genre(
+    request: Request,
     genre_id: str = Path(...),
-    genre_service: GenreElasticService = Depends(get_genre_service),
+    genre_service: GenreService = Depends(get_genre_service),
     author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+    response_cache: ResponseCache = Depends(get_response_cache),
 ) -> Optional[GenreBase]:
-    result = await genre_service.get(_id=genre_id)
-    return result
+    return await response_cache.get_or_build(
+        request,
+        lambda: genre_service.get(_id=genre_id),
+        GenreBase,
+        genre_service
+    )
@@ -1,14 +1,17 @@
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Path, Query
+from fastapi.responses import StreamingResponse
+from starlette.requests import Request
 
 from core.constants import ROLES
 from dependencies.auth import user_has_role
 from models.auth import UserInfoJWT
-from models.core import GetMultiQueryParam
+from models.core import GetMultiQueryParam, IdsBatch
 from models.params import Search, SearchValue
 from models.persons import PersonBase, PersonList
 from services.persons import PersonElasticService, get_person_service
+from services.response_cache import ResponseCache, get_response_cache
 
 persons = APIRouter()
 
@@ -20,12 +23,17 @@ persons = APIRouter()
     description='Список персоналий',
 )
 async def get_persons(
+        request: Request,
         person_service: PersonElasticService = Depends(get_person_service),
         query_params: GetMultiQueryParam = Depends(),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> PersonList:
-    results, count = await person_service.get_multi(query_params=query_params)
-    return PersonList(**query_params.dict(), rows_number=count, data=results)
+    async def build() -> PersonList:
+        results, page_info = await person_service.get_multi(query_params=query_params)
+        return PersonList(**query_params.dict(), **page_info.dict(), data=results)
+
+    return await response_cache.get_or_build(request, build, PersonList, person_service)
 
 
 @persons.get(
@@ -35,16 +43,49 @@ async def get_persons(
     description='Список персоналий с возможность поиска',
 )
 async def get_persons_search(
+        request: Request,
         person_service: PersonElasticService = Depends(get_person_service),
         query_params: GetMultiQueryParam = Depends(),
         query: Optional[str] = Query(None, description='Поиск по персоналиям'),
         author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+        response_cache: ResponseCache = Depends(get_response_cache),
 ) -> PersonList:
-    results, count = await person_service.get_multi(
-        query_params=query_params,
-        search=Search(values=[SearchValue(field='name', value=query)]) if query else None
-    )
-    return PersonList(**query_params.dict(), rows_number=count, data=results)
+    async def build() -> PersonList:
+        results, page_info = await person_service.get_multi(
+            query_params=query_params,
+            search=Search(values=[SearchValue(field='name', value=query)]) if query else None
+        )
+        return PersonList(**query_params.dict(), **page_info.dict(), data=results)
+
+    return await response_cache.get_or_build(request, build, PersonList, person_service)
+
+
+@persons.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Выгрузка всех личностей',
+    description='Потоковая выгрузка всех личностей в формате NDJSON (один объект на строку)',
+)
+async def export_persons(
+        person_service: PersonElasticService = Depends(get_person_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> StreamingResponse:
+    return StreamingResponse(person_service.export(model=PersonBase), media_type='application/x-ndjson')
+
+
+@persons.post(
+    '/batch',
+    response_model=List[PersonBase],
+    summary='Получение нескольких личностей',
+    description='Получение личностей по списку ID одним запросом (ненайденные объекты пропускаются)',
+)
+async def get_persons_batch(
+        batch: IdsBatch,
+        person_service: PersonElasticService = Depends(get_person_service),
+        author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+) -> List[PersonBase]:
+    results = await person_service.get_many(batch.ids)
+    return results
 
 
 @persons.get(
@@ -54,9 +95,15 @@ async def get_persons_search(
     description='Получить личность по ID',
 )
 async def get_person(
+    request: Request,
     person_id: str = Path(...),
     person_service: PersonElasticService = Depends(get_person_service),
     author: UserInfoJWT = Depends(user_has_role(ROLES.user)),
+    response_cache: ResponseCache = Depends(get_response_cache),
 ) -> Optional[PersonBase]:
-    result = await person_service.get(_id=person_id)
-    return result
+    return await response_cache.get_or_build(
+        request,
+        lambda: person_service.get(_id=person_id),
+        PersonBase,
+        person_service
+    )
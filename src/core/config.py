@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseSettings, SecretStr, Field
 
+from core.constants import ElasticIndexes
+
 
 class Settings(BaseSettings):
     class Config:
@@ -24,6 +26,8 @@ class Redis(Settings):
     pool_minsize: int = 10
     pool_maxsize: int = 20
     password: Optional[str] = None
+    # redis - сервер Redis, memory - хранилище в памяти процесса (локальная разработка, тесты)
+    backend: str = 'redis'
 
     class Config(Settings.Config):
         env_prefix = 'REDIS_'
@@ -32,11 +36,38 @@ class Redis(Settings):
 class Elastic(Settings):
     host: str = '127.0.0.1'
     port: int = 9200
+    max_result_window: int = 10000
+    export_batch_size: int = 1000
+    export_keep_alive: str = '1m'
+    trusted_source: bool = False
+    validation_sample_rate: float = 0.01
+    # elasticsearch - кластер Elasticsearch, memory - хранилище в памяти процесса (локальная разработка, тесты)
+    backend: str = 'elasticsearch'
+    # JSON-файл с документами для хранилища в памяти: {"<индекс>": [<документ>, ...]}
+    memory_data_path: Optional[str] = None
 
     class Config(Settings.Config):
         env_prefix = 'ELASTIC_'
 
 
+class Cache(Settings):
+    single_flight_redis_lock: bool = False
+    single_flight_lock_timeout_ms: int = 5000
+    single_flight_poll_interval_ms: int = 50
+    local_enabled: bool = False
+    local_max_size: int = 1024
+    local_ttl_seconds: int = 10
+    stale_data_seconds: int = 0
+    response_cache_enabled: bool = False
+    compression_codec: str = 'zlib'
+    compression_threshold_bytes: int = 1024
+    compression_level: int = 1
+    generation_check_seconds: float = 1.0
+
+    class Config(Settings.Config):
+        env_prefix = 'CACHE_'
+
+
 class Logger(Settings):
     log_level: str = 'DEBUG'
     force: bool = True
@@ -48,11 +79,62 @@ class Logger(Settings):
 
 class ExternalService(Settings):
     auth: str
+    timeout_seconds: float = 2.0
+    pool_size: int = 100
+    keepalive_seconds: float = 30.0
+    auth_cache_seconds: int = 60
+    auth_local_cache_size: int = 10000
+    auth_local_verification: bool = False
+    auth_jwt_secret: Optional[SecretStr] = None
+    auth_jwks_url: Optional[str] = None
+    auth_jwks_cache_seconds: int = 3600
+    auth_jwt_leeway_seconds: int = 30
 
     class Config(Settings.Config):
         env_prefix = 'EXTERNAL_'
 
 
+class Metrics(Settings):
+    enabled: bool = True
+    event_loop_interval_seconds: float = 1.0
+
+    class Config(Settings.Config):
+        env_prefix = 'METRICS_'
+
+
+class ServerTiming(Settings):
+    enabled: bool = False
+    log: bool = False
+
+    class Config(Settings.Config):
+        env_prefix = 'SERVER_TIMING_'
+
+
+class Warmup(Settings):
+    enabled: bool = True
+    # количество первых страниц списков (со значениями параметров по умолчанию), загружаемых в кэш
+    pages: int = 3
+    concurrency: int = 4
+    # после этого времени приложение считается готовым, даже если прогрев не завершён
+    timeout_seconds: float = 60.0
+    # период проверки номеров поколений индексов для повторного прогрева после переиндексации (0 - не проверять)
+    check_seconds: float = 30.0
+
+    class Config(Settings.Config):
+        env_prefix = 'WARMUP_'
+
+
+class Snapshot(Settings):
+    # небольшие, редко изменяемые индексы, которые целиком хранятся в памяти процесса
+    # (по умолчанию - ни одного, включается явно: SNAPSHOT_INDEXES='["genres"]')
+    indexes: List[ElasticIndexes] = []
+    refresh_seconds: float = 300.0
+    check_seconds: float = 5.0
+
+    class Config(Settings.Config):
+        env_prefix = 'SNAPSHOT_'
+
+
 class Test(Settings):
     token: Optional[str] = None
 
@@ -64,8 +146,13 @@ class Envs(Settings):
     project: Project = Project()
     redis: Redis = Redis()
     elastic: Elastic = Elastic()
+    cache: Cache = Cache()
     logger: Logger = Logger()
     external: ExternalService = ExternalService()
+    metrics: Metrics = Metrics()
+    server_timing: ServerTiming = ServerTiming()
+    warmup: Warmup = Warmup()
+    snapshot: Snapshot = Snapshot()
     test: Test = Test()
 
 
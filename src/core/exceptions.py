@@ -3,3 +3,10 @@ class NotAuthorized(Exception):
     Пользователь не авторизован в системе
     """
     pass
+
+
+class TokenVerificationUnavailable(Exception):
+    """
+    Токен невозможно проверить локально (нет подходящего ключа, неподдерживаемый алгоритм и т.п.)
+    """
+    pass
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import time
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+# Под gunicorn с несколькими воркерами метрики каждого процесса пишутся в файлы каталога PROMETHEUS_MULTIPROC_DIR
+# и объединяются при чтении (prometheus_client, multiprocess mode)
+MULTIPROCESS_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+LATENCY_BUCKETS = (.001, .0025, .005, .01, .025, .05, .075, .1, .25, .5, .75, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки запроса',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress',
+    'Количество запросов в обработке',
+    ['method'],
+    multiprocess_mode='livesum',
+)
+
+CACHE_REQUESTS = Counter(
+    'cache_requests',
+    'Обращения к кэшу (result: local_hit, hit, stale, miss)',
+    ['service', 'result'],
+)
+LOCAL_CACHE_EVICTIONS = Counter(
+    'local_cache_evictions',
+    'Удаления из локального кэша процесса (reason: size - вытеснено при переполнении, expired - истёк срок жизни)',
+    ['cache', 'reason'],
+)
+CACHE_LATENCY = Histogram(
+    'cache_read_duration_seconds',
+    'Время чтения из Redis',
+    ['service'],
+    buckets=LATENCY_BUCKETS,
+)
+
+CACHE_COMPRESSION_RAW_BYTES = Counter(
+    'cache_compression_raw_bytes',
+    'Размер сжатых значений кэша до сжатия (по префиксам ключей)',
+    ['prefix'],
+)
+CACHE_COMPRESSION_STORED_BYTES = Counter(
+    'cache_compression_stored_bytes',
+    'Размер сжатых значений кэша после сжатия (по префиксам ключей)',
+    ['prefix'],
+)
+CACHE_COMPRESSION_SECONDS = Counter(
+    'cache_compression_seconds',
+    'Процессорное время сжатия и распаковки значений кэша (operation: compress, decompress)',
+    ['prefix', 'operation'],
+)
+
+SINGLE_FLIGHT_REQUESTS = Counter(
+    'single_flight_requests',
+    'Загрузки при промахе кэша (result: executed - выполнена загрузка, coalesced - дождались загрузки '
+    'в этом процессе, remote_coalesced - дождались загрузки в другом процессе)',
+    ['service', 'result'],
+)
+
+ELASTIC_LATENCY = Histogram(
+    'elastic_request_duration_seconds',
+    'Время запроса к Elasticsearch (со стороны клиента)',
+    ['index', 'operation'],
+    buckets=LATENCY_BUCKETS,
+)
+ELASTIC_TOOK = Histogram(
+    'elastic_took_seconds',
+    'Время выполнения запроса по данным Elasticsearch (took)',
+    ['index', 'operation'],
+    buckets=LATENCY_BUCKETS,
+)
+
+AUTH_LATENCY = Histogram(
+    'auth_request_duration_seconds',
+    'Время запроса к сервису авторизации',
+    ['result'],
+    buckets=LATENCY_BUCKETS,
+)
+
+EVENT_LOOP_LAG = Histogram(
+    'event_loop_lag_seconds',
+    'Задержка event loop',
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def render() -> bytes:
+    """
+    Метрики в текстовом формате Prometheus (в multiprocess mode - по всем воркерам)
+
+    :return: тело ответа
+    """
+    if MULTIPROCESS_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry)
+
+
+async def monitor_event_loop_lag(interval_seconds: float = 1.0) -> None:
+    """
+    Измерение задержки event loop: насколько позже запланированного просыпается задача
+
+    :param interval_seconds: интервал измерений
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval_seconds)
+        EVENT_LOOP_LAG.observe(max(time.perf_counter() - started - interval_seconds, 0))
@@ -0,0 +1,94 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Интервалы текущего запроса: наименование -> [суммарная длительность в секундах, количество].
+# Вне запроса (или при отключённом Server-Timing) значение - None, и запись интервалов ничего не стоит.
+_spans: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar('server_timing_spans', default=None)
+
+
+def start(spans: Dict[str, List[float]]) -> Token:
+    """
+    Начало сбора интервалов для текущего запроса
+
+    :param spans: словарь, в который будут записываться интервалы
+    :return: токен для stop
+    """
+    return _spans.set(spans)
+
+
+def stop(token: Token) -> None:
+    """
+    Окончание сбора интервалов текущего запроса
+
+    :param token: токен из start
+    """
+    _spans.reset(token)
+
+
+def record(name: str, seconds: float) -> None:
+    """
+    Запись интервала в текущий запрос (интервалы с одним наименованием суммируются)
+
+    :param name: наименование интервала
+    :param seconds: длительность
+    """
+    spans = _spans.get()
+    if spans is None:
+        return
+
+    span = spans.setdefault(name, [0.0, 0])
+    span[0] += seconds
+    span[1] += 1
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Замер длительности блока кода"""
+    if _spans.get() is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - started)
+
+
+def timed(name: str) -> Callable:
+    """Замер длительности асинхронной функции"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _spans.get() is None:
+                return await func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def format_header(spans: Dict[str, List[float]], total_seconds: float) -> str:
+    """
+    Формирование значения заголовка Server-Timing
+
+    :param spans: интервалы запроса
+    :param total_seconds: общее время обработки запроса
+    :return: значение заголовка (длительности в миллисекундах)
+    """
+    metrics = [
+        f'{name};dur={seconds * 1000:.2f}' + (f';desc="{count} calls"' if count > 1 else '')
+        for name, (seconds, count) in spans.items()
+    ]
+    metrics.append(f'total;dur={total_seconds * 1000:.2f}')
+
+    return ', '.join(metrics)
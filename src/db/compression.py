@@ -0,0 +1,83 @@
+import time
+import zlib
+from typing import Callable, Dict, NamedTuple
+
+from core import metrics
+from db.envelope import ENVELOPE_MARKER
+
+
+class Codec(NamedTuple):
+    header: bytes
+    compress: Callable[[bytes, int], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+# Первый байт сжатого значения - идентификатор кодека. Несжатые значения хранятся без заголовка: это либо
+# JSON (записанный до появления формата записей, не может начинаться с управляющего символа), либо запись кэша,
+# которая начинается с db.envelope.ENVELOPE_MARKER. Поэтому заголовок кодека не может совпадать с этим маркером.
+CODECS: Dict[str, Codec] = {
+    'zlib': Codec(
+        header=b'\x01',
+        compress=lambda data, level: zlib.compress(data, level),
+        decompress=zlib.decompress,
+    ),
+}
+
+CODECS_BY_HEADER: Dict[int, Codec] = {codec.header[0]: codec for codec in CODECS.values()}
+
+assert ENVELOPE_MARKER not in CODECS_BY_HEADER, 'Заголовок кодека совпадает с маркером записи кэша'
+
+
+class Compressor:
+    """
+    Сжатие значений кэша, размер которых не меньше порога, с записью в метрики степени сжатия
+    и затраченного процессорного времени по префиксам ключей.
+    """
+
+    def __init__(self, codec: str = 'zlib', threshold_bytes: int = 1024, level: int = 1):
+        self.codec = CODECS[codec]
+        self.threshold_bytes = threshold_bytes
+        self.level = level
+
+    def compress(self, key: str, data: bytes) -> bytes:
+        """
+        Сжатие данных, если их размер не меньше порога
+
+        :param key: ключ в кэше (для метрик)
+        :param data: данные
+        :return: сжатые данные с заголовком кодека или исходные данные
+        """
+        if not self.threshold_bytes or len(data) < self.threshold_bytes:
+            return data
+
+        started = time.perf_counter()
+        result = self.codec.header + self.codec.compress(data, self.level)
+
+        prefix = self._prefix(key)
+        metrics.CACHE_COMPRESSION_SECONDS.labels(prefix, 'compress').inc(time.perf_counter() - started)
+        metrics.CACHE_COMPRESSION_RAW_BYTES.labels(prefix).inc(len(data))
+        metrics.CACHE_COMPRESSION_STORED_BYTES.labels(prefix).inc(len(result))
+
+        return result
+
+    def decompress(self, key: str, data: bytes) -> bytes:
+        """
+        Распаковка данных (данные без заголовка кодека возвращаются как есть)
+
+        :param key: ключ в кэше (для метрик)
+        :param data: данные из кэша
+        :return: распакованные данные
+        """
+        codec = CODECS_BY_HEADER.get(data[0]) if data else None
+        if codec is None:
+            return data
+
+        started = time.perf_counter()
+        result = codec.decompress(data[1:])
+
+        metrics.CACHE_COMPRESSION_SECONDS.labels(self._prefix(key), 'decompress').inc(time.perf_counter() - started)
+
+        return result
+
+    def _prefix(self, key: str) -> str:
+        return key.split(':', 1)[0]
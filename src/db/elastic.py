@@ -1,9 +1,123 @@
-from typing import Optional
+import abc
+from typing import Collection, List, Optional
 
 from elasticsearch import AsyncElasticsearch
 
-es: Optional[AsyncElasticsearch] = None
 
+class ElasticBackend(abc.ABC):
+    """
+    Хранилище документов, с которым работают сервисы: подмножество API Elasticsearch (get, mget, count, search
+    и point-in-time). Ответы - в формате Elasticsearch, отсутствующий документ - elasticsearch.NotFoundError.
 
-async def get_elastic() -> AsyncElasticsearch:
+    source_includes - поля документа, которые нужно вернуть в _source, filter_path - части ответа, которые нужно
+    вернуть (остальные отбрасываются на стороне Elasticsearch). Для search оба передаются в params
+    (_source_includes и filter_path).
+    """
+
+    @abc.abstractmethod
+    async def get(
+            self,
+            index: str,
+            id: str,
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        ...
+
+    @abc.abstractmethod
+    async def mget(
+            self,
+            index: str,
+            ids: List[str],
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        ...
+
+    @abc.abstractmethod
+    async def count(self, index: str, body: Optional[dict] = None) -> dict:
+        ...
+
+    @abc.abstractmethod
+    async def search(
+            self,
+            index: Optional[str] = None,
+            body: Optional[dict] = None,
+            params: Optional[dict] = None
+    ) -> dict:
+        ...
+
+    async def open_point_in_time(self, index: str, keep_alive: str) -> Optional[str]:
+        """
+        Открытие point-in-time для последовательного чтения индекса
+
+        :return: идентификатор point-in-time или None, если хранилище его не поддерживает
+        """
+        return None
+
+    async def close_point_in_time(self, pit_id: str) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class ElasticsearchBackend(ElasticBackend):
+    def __init__(self, client: AsyncElasticsearch):
+        self.client = client
+
+    async def get(
+            self,
+            index: str,
+            id: str,
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        return await self.client.get(
+            index=index, id=id, _source_includes=source_includes, filter_path=filter_path
+        )
+
+    async def mget(
+            self,
+            index: str,
+            ids: List[str],
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        return await self.client.mget(
+            index=index, body={'ids': ids}, _source_includes=source_includes, filter_path=filter_path
+        )
+
+    async def count(self, index: str, body: Optional[dict] = None) -> dict:
+        return await self.client.count(index=index, body=body)
+
+    async def search(
+            self,
+            index: Optional[str] = None,
+            body: Optional[dict] = None,
+            params: Optional[dict] = None
+    ) -> dict:
+        return await self.client.search(index=index, body=body, params=params)
+
+    async def open_point_in_time(self, index: str, keep_alive: str) -> Optional[str]:
+        # в клиенте 7.9 нет методов для point-in-time (появился в Elasticsearch 7.10) - запрос отправляется напрямую
+        result = await self.client.transport.perform_request(
+            'POST',
+            f'/{index}/_pit',
+            params={'keep_alive': keep_alive}
+        )
+
+        return result.get('id')
+
+    async def close_point_in_time(self, pit_id: str) -> None:
+        await self.client.transport.perform_request('DELETE', '/_pit', body={'id': pit_id})
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+es: Optional[ElasticBackend] = None
+
+
+async def get_elastic() -> ElasticBackend:
     return es
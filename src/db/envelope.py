@@ -0,0 +1,70 @@
+import hashlib
+import struct
+import time
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional, Type
+
+import orjson
+from pydantic import BaseModel
+
+# Формат записи: заголовок фиксированной длины + payload в JSON (orjson).
+# Заголовок: маркер формата, версия формата, версия схемы модели (4 байта хэша), время создания записи.
+# маркер занимает то же пространство первого байта, что и заголовки кодеков сжатия (db.compression.CODECS)
+ENVELOPE_MARKER = 0x02
+ENVELOPE_VERSION = 1
+ENVELOPE_HEADER = struct.Struct('>BBId')
+
+
+class CacheEntry(NamedTuple):
+    schema: int
+    created_at: float
+    data: Any
+
+
+@lru_cache
+def schema_version(model: Type[BaseModel]) -> int:
+    """
+    Версия схемы модели - хэш её JSON-схемы (меняется при изменении полей, в том числе вложенных моделей)
+
+    :param model: pydantic-схема
+    :return: версия схемы
+    """
+    digest = hashlib.blake2b(model.schema_json().encode(), digest_size=4).digest()
+
+    return int.from_bytes(digest, 'big')
+
+
+def pack_entry(model: Type[BaseModel], data: Any, created_at: Optional[float] = None) -> bytes:
+    """
+    Упаковка данных в запись кэша
+
+    :param model: pydantic-схема, в которую данные будут преобразованы при чтении
+    :param data: данные
+    :param created_at: время создания записи
+    :return: запись кэша
+    """
+    created_at = created_at if created_at is not None else time.time()
+    header = ENVELOPE_HEADER.pack(ENVELOPE_MARKER, ENVELOPE_VERSION, schema_version(model), created_at)
+
+    return header + orjson.dumps(data)
+
+
+def unpack_entry(model: Type[BaseModel], raw: Optional[bytes]) -> Optional[CacheEntry]:
+    """
+    Распаковка записи кэша.
+
+    Записи другого формата (в том числе от предыдущих версий сервиса) и записи, созданные для другой версии
+    схемы модели, не распаковываются - payload таких записей даже не разбирается.
+
+    :param model: pydantic-схема, в которую данные будут преобразованы
+    :param raw: запись кэша
+    :return: распакованная запись или None
+    """
+    if not raw or len(raw) < ENVELOPE_HEADER.size:
+        return None
+
+    marker, version, schema, created_at = ENVELOPE_HEADER.unpack_from(raw)
+    if marker != ENVELOPE_MARKER or version != ENVELOPE_VERSION or schema != schema_version(model):
+        return None
+
+    return CacheEntry(schema=schema, created_at=created_at, data=orjson.loads(raw[ENVELOPE_HEADER.size:]))
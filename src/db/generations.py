@@ -0,0 +1,52 @@
+import time
+from typing import Dict, Tuple
+
+from aioredis import Redis
+
+
+class IndexGenerations:
+    """
+    Номера поколений индексов Elasticsearch, хранящиеся в Redis.
+
+    Номер поколения входит в каждый ключ кэша индекса, поэтому после переиндексации достаточно одной команды
+    ``INCR generation:<index>``, чтобы все записи кэша индекса перестали читаться (и истекли по TTL).
+    Текущий номер кэшируется в памяти процесса на check_seconds.
+    """
+    KEY_PREFIX = 'generation'
+
+    def __init__(self, storage: Redis, check_seconds: float = 1.0):
+        self.storage = storage
+        self.check_seconds = check_seconds
+        self._cache: Dict[str, Tuple[float, int]] = {}
+
+    async def get(self, index: str) -> int:
+        """
+        Текущий номер поколения индекса
+
+        :param index: наименование индекса
+        :return: номер поколения
+        """
+        now = time.monotonic()
+        cached = self._cache.get(index)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        value = int(await self.storage.get(self._generate_key(index)) or 0)
+        self._cache[index] = (now + self.check_seconds, value)
+
+        return value
+
+    async def bump(self, index: str) -> int:
+        """
+        Инвалидация кэша индекса (увеличение номера поколения)
+
+        :param index: наименование индекса
+        :return: новый номер поколения
+        """
+        value = await self.storage.incr(self._generate_key(index))
+        self._cache[index] = (time.monotonic() + self.check_seconds, value)
+
+        return value
+
+    def _generate_key(self, index: str) -> str:
+        return f'{self.KEY_PREFIX}:{index}'
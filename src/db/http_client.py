@@ -0,0 +1,9 @@
+from typing import Optional
+
+from aiohttp import ClientSession
+
+session: Optional[ClientSession] = None
+
+
+async def get_http_client() -> ClientSession:
+    return session
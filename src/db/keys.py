@@ -0,0 +1,43 @@
+import hashlib
+import unicodedata
+from typing import Any
+
+import orjson
+
+# Части ключа длиннее этого значения заменяются хэшем, чтобы длина ключа не зависела от пользовательского ввода
+MAX_KEY_PART_LENGTH = 64
+
+
+def normalize_text(value: Any) -> str:
+    """
+    Нормализация строки для поиска: NFKC, приведение регистра и схлопывание пробельных символов
+
+    :param value: значение
+    :return: нормализованная строка
+    """
+    return ' '.join(unicodedata.normalize('NFKC', str(value)).casefold().split())
+
+
+def digest(value: Any) -> str:
+    """
+    Хэш фиксированной длины от значения, сериализуемого в JSON
+
+    :param value: значение
+    :return: хэш в виде hex-строки (32 символа)
+    """
+    data = value if isinstance(value, bytes) else orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def bounded(value: str) -> str:
+    """
+    Часть ключа ограниченной длины: короткие значения остаются читаемыми, длинные заменяются хэшем
+
+    :param value: часть ключа
+    :return: часть ключа не длиннее MAX_KEY_PART_LENGTH
+    """
+    if len(value) <= MAX_KEY_PART_LENGTH and ':' not in value:
+        return value
+
+    return digest(value.encode())
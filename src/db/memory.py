@@ -0,0 +1,70 @@
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+from core import metrics
+
+
+class MemoryCache:
+    """
+    Ограниченный по размеру и времени жизни LRU-кэш в памяти процесса.
+
+    Используется как первый уровень кэширования перед Redis: хранит уже собранные объекты (pydantic-модели),
+    поэтому попадание в него не требует ни сетевого запроса, ни десериализации.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float, name: str = 'default'):
+        """
+        :param max_size: максимальное количество ключей
+        :param ttl_seconds: максимальное время жизни данных
+        :param name: название кэша в метриках
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+
+    def get(self, key: str, default=None) -> Any:
+        """Получить данные по ключу, продлевая их позицию в LRU"""
+        item = self._data.get(key)
+        if item is None:
+            return default
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self._count_eviction('expired')
+            return default
+
+        self._data.move_to_end(key)
+
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Сохранение данных под ключом
+
+        :param key: ключ
+        :param value: данные
+        :param ttl_seconds: время жизни (не больше заданного для кэша)
+        """
+        if self.max_size <= 0:
+            return
+
+        ttl_seconds = min(ttl_seconds, self.ttl_seconds) if ttl_seconds is not None else self.ttl_seconds
+        self._data[key] = (time.monotonic() + ttl_seconds, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self._count_eviction('size')
+
+    def invalidate(self, key: str) -> None:
+        """Удаление данных по ключу"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def _count_eviction(self, reason: str) -> None:
+        metrics.LOCAL_CACHE_EVICTIONS.labels(self.name, reason).inc()
@@ -0,0 +1,244 @@
+import re
+import time
+from typing import Any, Awaitable, Callable, Collection, Dict, Iterable, List, Optional
+
+import elasticsearch
+import orjson
+
+from db.elastic import ElasticBackend
+
+Delay = Callable[[], Awaitable[None]]
+
+# разбиение текста на слова, близкое к standard analyzer Elasticsearch (границы слов Unicode): дефисы и прочие
+# знаки разделяют слова, а точка и апостроф между буквами или цифрами - нет (Sci-Fi -> sci, fi; don't -> don't)
+WORD_PATTERN = re.compile(r"\w+(?:[.'’]\w+)*")
+
+
+class MemoryElasticBackend(ElasticBackend):
+    """
+    Хранилище документов в памяти процесса (локальная разработка, тесты, профилирование).
+
+    Поддерживается то подмножество запросов, которое формируют сервисы: bool-запрос с match (совпадение хотя бы
+    одного слова без учёта регистра, слова выделяются как в standard analyzer) и fuzzy (точное совпадение
+    без учёта регистра, в том числе с элементом списка), сортировка, from/size, search_after и track_total_hits.
+    _source includes и filter_path применяются так же, как в Elasticsearch (includes - только по полям верхнего
+    уровня).
+    """
+
+    def __init__(self, documents: Optional[Dict[str, Iterable[dict]]] = None, delay: Optional[Delay] = None):
+        """
+        :param documents: документы индексов (идентификатор документа - поле id)
+        :param delay: функция, имитирующая сетевую задержку каждого запроса
+        """
+        self.indexes: Dict[str, Dict[str, dict]] = {}
+        self.delay = delay
+        for index, docs in (documents or {}).items():
+            self.add_documents(index, docs)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'MemoryElasticBackend':
+        """
+        Загрузка документов из JSON-файла вида {"<индекс>": [<документ>, ...]}
+
+        :param path: путь к файлу
+        :return: хранилище
+        """
+        with open(path, 'rb') as f:
+            return cls(orjson.loads(f.read()))
+
+    def add_documents(self, index: str, documents: Iterable[dict]) -> None:
+        docs = self.indexes.setdefault(index, {})
+        for i in documents:
+            docs[str(i['id'])] = i
+
+    async def get(
+            self,
+            index: str,
+            id: str,
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        await self._wait()
+        doc = self.indexes.get(index, {}).get(id)
+        if doc is None:
+            raise elasticsearch.NotFoundError(404, 'not_found', {'_index': index, '_id': id, 'found': False})
+
+        return self._filter_path(
+            {'_index': index, '_id': id, 'found': True, '_source': self._source(doc, source_includes)},
+            filter_path
+        )
+
+    async def mget(
+            self,
+            index: str,
+            ids: List[str],
+            source_includes: Optional[Collection[str]] = None,
+            filter_path: Optional[Collection[str]] = None
+    ) -> dict:
+        await self._wait()
+        docs = self.indexes.get(index, {})
+
+        return self._filter_path(
+            {
+                'docs': [
+                    {'_index': index, '_id': i, 'found': True, '_source': self._source(docs[i], source_includes)}
+                    if i in docs else {'_index': index, '_id': i, 'found': False}
+                    for i in ids
+                ]
+            },
+            filter_path
+        )
+
+    async def count(self, index: str, body: Optional[dict] = None) -> dict:
+        await self._wait()
+
+        return {'count': len(self._filter(index, (body or {}).get('query')))}
+
+    async def search(
+            self,
+            index: Optional[str] = None,
+            body: Optional[dict] = None,
+            params: Optional[dict] = None
+    ) -> dict:
+        started = time.perf_counter()
+        await self._wait()
+        body, params = body or {}, params or {}
+
+        docs = self._filter(index, body.get('query'))
+        sort = self._sort_fields(params.get('sort') or body.get('sort'))
+        docs.sort(key=lambda doc: self._sort_key(doc, sort))
+
+        search_after = body.get('search_after')
+        if search_after:
+            after = self._sort_key(dict(zip([field for field, _ in sort], search_after)), sort)
+            docs = [i for i in docs if self._sort_key(i, sort) > after]
+
+        size = int(params.get('size', body.get('size', 10)))
+        offset = int(params.get('from', body.get('from', 0)))
+        source_includes = params.get('_source_includes') or body.get('_source')
+
+        hits = {
+            'hits': [
+                {
+                    '_index': index,
+                    '_id': str(i['id']),
+                    '_source': self._source(i, source_includes),
+                    'sort': [i.get(field) for field, _ in sort],
+                }
+                for i in docs[offset:offset + size]
+            ]
+        }
+        if str(params.get('track_total_hits', body.get('track_total_hits', 'true'))).lower() != 'false':
+            hits['total'] = {'value': len(docs), 'relation': 'eq'}
+
+        return self._filter_path(
+            {'took': int((time.perf_counter() - started) * 1000), 'timed_out': False, 'hits': hits},
+            params.get('filter_path')
+        )
+
+    async def _wait(self) -> None:
+        if self.delay is not None:
+            await self.delay()
+
+    def _source(self, doc: dict, source_includes: Any) -> dict:
+        # поддерживается фильтрация только по полям верхнего уровня
+        if isinstance(source_includes, dict):
+            source_includes = source_includes.get('includes')
+        if isinstance(source_includes, str):
+            source_includes = source_includes.split(',')
+        if not isinstance(source_includes, (list, tuple, set, frozenset)) or not source_includes:
+            return doc
+
+        fields = {i.split('.', 1)[0] for i in source_includes}
+
+        return {key: value for key, value in doc.items() if key in fields}
+
+    def _filter_path(self, response: dict, filter_path: Any) -> dict:
+        if not filter_path:
+            return response
+
+        if isinstance(filter_path, str):
+            filter_path = filter_path.split(',')
+
+        return self._select(response, [i.split('.') for i in filter_path]) or {}
+
+    def _select(self, value: Any, paths: List[List[str]]) -> Any:
+        # списки прозрачны для путей, пустые объекты не возвращаются (как в Elasticsearch)
+        if any(not i for i in paths):
+            return value
+
+        if isinstance(value, list):
+            items = [i for i in (self._select(j, paths) for j in value) if i is not None]
+            return items or None
+
+        if not isinstance(value, dict):
+            return None
+
+        result = {}
+        for key, item in value.items():
+            subpaths = [i[1:] for i in paths if i[0] in (key, '*')]
+            if subpaths:
+                selected = self._select(item, subpaths)
+                if selected is not None:
+                    result[key] = selected
+
+        return result or None
+
+    def _filter(self, index: Optional[str], query: Optional[dict]) -> List[dict]:
+        docs = list(self.indexes.get(index, {}).values())
+        if not query:
+            return docs
+
+        conditions = query.get('bool', {})
+        matches = conditions.get('must', {}).get('match', {})
+        filters = [(field, value) for i in conditions.get('filter', []) for field, value in i.get('fuzzy', {}).items()]
+
+        return [
+            i for i in docs
+            if all(self._match(i.get(field), value) for field, value in matches.items())
+            and all(self._fuzzy(i.get(field), value) for field, value in filters)
+        ]
+
+    def _match(self, value: Any, query: Any) -> bool:
+        words = set(self._words(value))
+
+        return any(i in words for i in self._words(query))
+
+    def _words(self, value: Any) -> List[str]:
+        return WORD_PATTERN.findall(str(value or '').lower())
+
+    def _fuzzy(self, value: Any, query: Any) -> bool:
+        values = value if isinstance(value, list) else [value]
+
+        return any(str(i).lower() == str(query).lower() for i in values if i is not None)
+
+    def _sort_fields(self, sort: Any) -> List[tuple]:
+        if not sort:
+            return [('id', 'asc')]
+
+        if isinstance(sort, str):
+            return [tuple(i.split(':')) if ':' in i else (i, 'asc') for i in sort.split(',')]
+
+        return [next(iter(i.items())) for i in sort]
+
+    def _sort_key(self, doc: dict, sort: List[tuple]) -> tuple:
+        # отсутствующие значения - в конце при любом направлении сортировки, как в Elasticsearch
+        key = []
+        for field, order in sort:
+            # подполя (например, title.raw) сортируются по значению исходного поля
+            value = doc.get(field, doc.get(field.split('.', 1)[0]))
+            if isinstance(value, (int, float)) and order == 'desc':
+                value = -value
+            elif isinstance(value, str) and order == 'desc':
+                value = _Descending(value)
+            key.append((value is None, value if value is not None else 0))
+
+        return tuple(key)
+
+
+class _Descending(str):
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+    def __gt__(self, other):
+        return str.__lt__(self, other)
@@ -0,0 +1,113 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+Delay = Callable[[], Awaitable[None]]
+
+
+class MemoryRedis:
+    """
+    Замена пула aioredis в памяти процесса (локальная разработка, тесты, профилирование).
+
+    Поддерживаются команды, которые использует сервис: GET, SET (с EX/PX и NX), MGET, INCR, DEL, pipeline из SET
+    и EVAL скрипта снятия блокировки. Время жизни ключей соблюдается: истёкшие ключи не возвращаются.
+    """
+    SET_IF_NOT_EXIST = 'SET_IF_NOT_EXIST'
+
+    def __init__(self, delay: Optional[Delay] = None):
+        """
+        :param delay: функция, имитирующая сетевую задержку каждой команды
+        """
+        self.data: Dict[str, Tuple[bytes, Optional[float]]] = {}
+        self.delay = delay
+
+    async def get(self, key: str, **kwargs) -> Optional[bytes]:
+        await self._wait()
+
+        return self._get(key)
+
+    async def mget(self, *keys: str) -> List[Optional[bytes]]:
+        await self._wait()
+
+        return [self._get(i) for i in keys]
+
+    async def set(self, key: str, value: Any, expire: int = 0, pexpire: int = 0, exist: Optional[str] = None) -> bool:
+        await self._wait()
+
+        return self._set(key, value, expire, pexpire, exist)
+
+    async def incr(self, key: str) -> int:
+        await self._wait()
+        value = int(self._get(key) or 0) + 1
+        expires_at = self.data[key][1] if key in self.data else None
+        self.data[key] = (str(value).encode(), expires_at)
+
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        await self._wait()
+
+        return sum(self._get(i) is not None and self.data.pop(i, None) is not None for i in keys)
+
+    async def eval(self, script: str, keys: Sequence[str] = (), args: Sequence[Any] = ()) -> int:
+        # единственный используемый скрипт - снятие блокировки, если она всё ещё принадлежит владельцу
+        await self._wait()
+        key, token = keys[0], args[0]
+        if self._get(key) == self._encode(token):
+            del self.data[key]
+            return 1
+
+        return 0
+
+    def pipeline(self) -> '_MemoryPipeline':
+        return _MemoryPipeline(self)
+
+    def close(self) -> None:
+        pass
+
+    async def wait_closed(self) -> None:
+        pass
+
+    async def _wait(self) -> None:
+        if self.delay is not None:
+            await self.delay()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+
+        return value
+
+    def _set(self, key: str, value: Any, expire: int = 0, pexpire: int = 0, exist: Optional[str] = None) -> bool:
+        if exist == self.SET_IF_NOT_EXIST and self._get(key) is not None:
+            return False
+
+        ttl = expire or pexpire / 1000
+        self.data[key] = (self._encode(value), time.monotonic() + ttl if ttl else None)
+
+        return True
+
+    def _encode(self, value: Any) -> bytes:
+        if isinstance(value, bytes):
+            return value
+
+        return value.encode() if isinstance(value, str) else str(value).encode()
+
+
+class _MemoryPipeline:
+    def __init__(self, redis: MemoryRedis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key: str, value: Any, expire: int = 0, pexpire: int = 0) -> None:
+        self.commands.append((key, value, expire, pexpire))
+
+    async def execute(self) -> List[bool]:
+        await self.redis._wait()
+
+        return [self.redis._set(*i) for i in self.commands]
@@ -1,50 +1,116 @@
-import json
 from functools import lru_cache
-from json import JSONEncoder
-from typing import Any, Optional
-from uuid import UUID
+from typing import Any, Dict, List, Optional, Sequence
 
 import orjson
 from aioredis import Redis
 
-redis: Optional[Redis] = None
-
-old_default = JSONEncoder.default
-
-
-def new_default(self, obj):
-    if isinstance(obj, UUID):
-        return str(obj)
-    return old_default(self, obj)
+from core import timing
+from core.config import envs
+from db.compression import Compressor
 
-
-JSONEncoder.default = new_default
+redis: Optional[Redis] = None
 
 
 class RedisCache:
     """
     Класс для хранения состояния при работе с данными, чтобы постоянно не перечитывать данные с начала.
+
+    Значения больше порога компрессора сжимаются, несжатые значения читаются как есть.
     """
 
-    def __init__(self, storage: Redis):
+    def __init__(self, storage: Redis, compressor: Optional[Compressor] = None):
         self.storage = storage
+        self.compressor = compressor
 
+    @timing.timed('redis')
     async def set(self, key: str, value: Any, expire_time_seconds: int) -> None:
-        """Сохранение данных под определенным ключом"""
-        value = self._encode_json(value)
-        await self.storage.setex(key=key, value=value, seconds=expire_time_seconds)
-        await self.storage.set(key=key, value=value)
+        """Сохранение данных под определенным ключом (одной командой SET вместе со временем жизни)"""
+        await self.storage.set(key, self._pack(key, self._encode_json(value)), expire=expire_time_seconds)
+
+    @timing.timed('redis')
+    async def set_many(self, values: Dict[str, Any], expire_time_seconds: int) -> None:
+        """
+        Сохранение нескольких значений за один сетевой запрос (pipeline)
+
+        :param values: словарь вида ключ - данные
+        :param expire_time_seconds: время жизни каждого ключа
+        """
+        if not values:
+            return
+
+        pipeline = self.storage.pipeline()
+        for key, value in values.items():
+            pipeline.set(key, self._pack(key, self._encode_json(value)), expire=expire_time_seconds)
 
+        await pipeline.execute()
+
+    @timing.timed('redis')
     async def get(self, key: str, default=None) -> Any:
         """Получить данные по определённому ключу"""
         result = await self.storage.get(key=key)
         if not result:
             return default
 
-        result = self._decode_json(result)
+        result = self._decode_json(self._unpack(key, result))
 
         return result
 
+    @timing.timed('redis')
+    async def get_raw(self, key: str) -> Optional[bytes]:
+        """Получить данные по ключу без JSON-десериализации (например, готовое тело ответа)"""
+        result = await self.storage.get(key=key)
+
+        return self._unpack(key, result) if result else result
+
+    @timing.timed('redis')
+    async def set_raw(self, key: str, value: bytes, expire_time_seconds: int) -> None:
+        """Сохранение уже сериализованных данных под ключом"""
+        await self.storage.set(key, self._pack(key, value), expire=expire_time_seconds)
+
+    @timing.timed('redis')
+    async def get_many(self, keys: Sequence[str], default=None) -> List[Any]:
+        """
+        Получение данных по нескольким ключам одной командой MGET
+
+        :param keys: ключи
+        :param default: значение для отсутствующих ключей
+        :return: список данных в порядке переданных ключей
+        """
+        if not keys:
+            return []
+
+        results = await self.storage.mget(*keys)
+
+        return [self._decode_json(self._unpack(key, i)) if i else default for key, i in zip(keys, results)]
+
+    @timing.timed('redis')
+    async def get_many_raw(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        """Получение уже сериализованных данных по нескольким ключам одной командой MGET"""
+        if not keys:
+            return []
+
+        results = await self.storage.mget(*keys)
+
+        return [self._unpack(key, i) if i else None for key, i in zip(keys, results)]
+
+    @timing.timed('redis')
+    async def set_many_raw(self, values: Dict[str, bytes], expire_time_seconds: int) -> None:
+        """Сохранение нескольких уже сериализованных значений за один сетевой запрос (pipeline)"""
+        if not values:
+            return
+
+        pipeline = self.storage.pipeline()
+        for key, value in values.items():
+            pipeline.set(key, self._pack(key, value), expire=expire_time_seconds)
+
+        await pipeline.execute()
+
+    def _pack(self, key: str, val: bytes) -> bytes:
+        return self.compressor.compress(key, val) if self.compressor else val
+
+    def _unpack(self, key: str, val: bytes) -> bytes:
+        return self.compressor.decompress(key, val) if self.compressor else val
+
     def _decode_json(self, val: Any) -> Any:
         """
         Распаковка данных из кэша
@@ -54,16 +120,21 @@ class RedisCache:
         """
         return orjson.loads(val)
 
-    def _encode_json(self, val: Any) -> str:
+    def _encode_json(self, val: Any) -> bytes:
         """
         Запаковка данных для кэша
 
         :param val: данные
         :return: запакованные данные
         """
-        return json.dumps(val)
+        return orjson.dumps(val)
 
 
 @lru_cache
 def get_redis() -> RedisCache:
-    return RedisCache(storage=redis)
+    compressor = Compressor(
+        codec=envs.cache.compression_codec,
+        threshold_bytes=envs.cache.compression_threshold_bytes,
+        level=envs.cache.compression_level,
+    )
+    return RedisCache(storage=redis, compressor=compressor)
@@ -1,12 +1,12 @@
-from typing import Union, Iterable
+from typing import Iterable, Union
 
-import requests
-from fastapi import security, Depends
-from http3 import AsyncClient
+from fastapi import Depends, security
 
+from core import timing
 from core.config import envs
 from core.exceptions import NotAuthorized
 from models.auth import UserInfoJWT
+from services.auth import AuthService, get_auth_service
 
 
 def jwt_token_dep(
@@ -15,9 +15,6 @@ def jwt_token_dep(
     return token.credentials
 
 
-http_client = AsyncClient()
-
-
 # noinspection PyPep8Naming
 class user_has_role:
     TEST_TOKEN = envs.test.token
@@ -30,21 +27,20 @@ class user_has_role:
         if isinstance(required_roles, str):
             required_roles = [required_roles]
 
-        self.required_roles = required_roles
-        self.required_roles.append(self.ROOT_ROLE_NAME)
+        self.required_roles = [*required_roles, self.ROOT_ROLE_NAME]
 
-    def __call__(self, token: str = Depends(jwt_token_dep)) -> UserInfoJWT:
+    async def __call__(
+            self,
+            token: str = Depends(jwt_token_dep),
+            auth_service: AuthService = Depends(get_auth_service),
+    ) -> UserInfoJWT:
         if token == self.TEST_TOKEN:
             return UserInfoJWT(role_name=self.ROOT_ROLE_NAME)
 
-        url = envs.external.auth
-        data = {
-            'token': token
-        }
-        data = requests.post(url=url, json=data).json()
-        result = UserInfoJWT(**data)
+        with timing.span('auth'):
+            result = await auth_service.validate(token)
 
-        if result.role_name not in self.required_roles or result.role_name != self.ROOT_ROLE_NAME:
+        if result.role_name not in self.required_roles:
             raise NotAuthorized()
 
         return result
@@ -1,15 +1,29 @@
 import aioredis
+import orjson
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
 from elasticsearch import AsyncElasticsearch
 from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from api.exceptions import add_exception_handlers
+from api.health import health
+from api.metrics import add_metrics
+from api.server_timing import add_server_timing
 from api.v1.films import films
 from api.v1.genres import genres
 from api.v1.persons import persons
 from core.config import envs
-from db import elastic, redis
+from db import elastic, http_client, redis
+from db.elastic import ElasticsearchBackend
+from db.memory_elastic import MemoryElasticBackend
+from db.memory_redis import MemoryRedis
+from db.redis import get_redis
+from services.films import get_film_service
+from services.genres import get_genre_service
+from services.persons import get_person_service
+from services.snapshot import SnapshotElasticService
+from services.warmup import get_cache_warmer
 
 default_errors = {
     401: {'description': 'Unauthorized'},
@@ -52,6 +66,8 @@ app = FastAPI(
 )
 
 add_exception_handlers(app)
+add_metrics(app)
+add_server_timing(app)
 
 app.add_middleware(
     CORSMiddleware,
@@ -65,22 +81,49 @@ app.add_middleware(
 
 @app.on_event('startup')
 async def on_startup():
-    redis.redis = await aioredis.create_redis_pool(
-        (envs.redis.host, envs.redis.port),
-        password=envs.redis.password,
-        minsize=envs.redis.pool_minsize,
-        maxsize=envs.redis.pool_maxsize
+    if envs.redis.backend == 'memory':
+        redis.redis = MemoryRedis()
+    else:
+        redis.redis = await aioredis.create_redis_pool(
+            (envs.redis.host, envs.redis.port),
+            password=envs.redis.password,
+            minsize=envs.redis.pool_minsize,
+            maxsize=envs.redis.pool_maxsize
+        )
+
+    if envs.elastic.backend == 'memory':
+        elastic.es = (
+            MemoryElasticBackend.from_file(envs.elastic.memory_data_path)
+            if envs.elastic.memory_data_path else MemoryElasticBackend()
+        )
+    else:
+        elastic.es = ElasticsearchBackend(AsyncElasticsearch(hosts=[f'{envs.elastic.host}:{envs.elastic.port}']))
+
+    http_client.session = ClientSession(
+        connector=TCPConnector(limit=envs.external.pool_size, keepalive_timeout=envs.external.keepalive_seconds),
+        timeout=ClientTimeout(total=envs.external.timeout_seconds),
+        json_serialize=lambda v: orjson.dumps(v).decode(),
     )
 
-    elastic.es = AsyncElasticsearch(hosts=[f'{envs.elastic.host}:{envs.elastic.port}'])
+    get_cache_warmer().start()
 
 
 @app.on_event('shutdown')
 async def on_shutdown():
-    await redis.redis.close()
+    await get_cache_warmer().stop()
+    # фоновое обновление снимков индексов, хранящихся в памяти
+    for factory in (get_film_service, get_genre_service, get_person_service):
+        service = factory(redis=get_redis(), elastic=elastic.es)
+        if isinstance(service, SnapshotElasticService):
+            await service.stop()
+
+    redis.redis.close()
+    await redis.redis.wait_closed()
     await elastic.es.close()
+    await http_client.session.close()
 
 
+app.include_router(health, prefix='/health')
 app.include_router(films, prefix='/v1/films', tags=['Films'], responses=default_errors)
 app.include_router(genres, prefix='/v1/genres', tags=['Genres'], responses=default_errors)
 app.include_router(persons, prefix='/v1/persons', tags=['Persons'], responses=default_errors)
@@ -1,8 +1,10 @@
-from typing import List, Optional, TypeVar
+import inspect
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple, Type, TypeVar
 
 import orjson
 from fastapi import Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic.types import UUID4
 
 
@@ -22,6 +24,50 @@ class Model(BaseModel):
 ListElement = TypeVar('ListElement', bound=Model)
 
 
+@lru_cache
+def _model_field_aliases(model: Type[Model]) -> Tuple[Tuple[str, str], ...]:
+    return tuple((name, field.alias) for name, field in model.__fields__.items())
+
+
+@lru_cache
+def model_source_fields(model: Type[Model], exclude: FrozenSet[str] = frozenset()) -> Tuple[str, ...]:
+    """
+    Поля документа, из которых собирается модель (для _source includes в запросах к Elasticsearch).
+
+    Модель заполняется как по именам полей, так и по алиасам, поэтому запрашиваются и те, и другие.
+    Вложенные модели запрашиваются целиком (по имени поля верхнего уровня).
+
+    :param model: pydantic-схема
+    :param exclude: поля, которые не нужно запрашивать (по имени или алиасу)
+    :return: наименования полей
+    """
+    return tuple(sorted({
+        i for name, alias in _model_field_aliases(model) if name not in exclude and alias not in exclude
+        for i in (name, alias)
+    }))
+
+
+def construct_trusted(model: Type[Model], values: dict) -> Model:
+    """
+    Сборка модели из заведомо корректных данных без валидации.
+
+    В отличие от ``Model.construct`` поддерживает алиасы полей и отбрасывает поля, которых нет в модели.
+    Вложенные модели остаются словарями, а типы значений не приводятся.
+
+    :param model: pydantic-схема
+    :param values: данные (по именам полей или их алиасам)
+    :return: объект модели
+    """
+    fields = {}
+    for name, alias in _model_field_aliases(model):
+        if alias in values:
+            fields[name] = values[alias]
+        elif name in values:
+            fields[name] = values[name]
+
+    return model.construct(_fields_set=set(fields), **fields)
+
+
 class IdMixin(Model):
     """
     Миксин с полем Id для объектов.
@@ -51,16 +97,49 @@ class GetMultiQueryParam:
                 description='Количество объектов на одной странице'
             ),
             sort_by: str = Query(default='id', description='Поле сортировки результатов'),
-            descending: bool = Query(default=False, description='Использовать ли обратный порядок сортировки')
+            descending: bool = Query(default=False, description='Использовать ли обратный порядок сортировки'),
+            with_total: bool = Query(
+                default=True,
+                alias='page[total]',
+                description='Подсчитывать ли общее количество объектов (без подсчёта возвращается только has_next)'
+            ),
+            cursor: Optional[str] = Query(
+                default=None,
+                alias='page[cursor]',
+                description='Курсор следующей страницы (next_cursor из предыдущего ответа), заменяет номер страницы'
+            ),
     ):
         self.rows_per_page = rows_per_page
         self.page = page
         self.sort_by = sort_by
         self.descending = descending
+        self.with_total = with_total
+        self.cursor = cursor
 
     def dict(self):
         return vars(self)
 
+    @classmethod
+    def defaults(cls, **values) -> 'GetMultiQueryParam':
+        """
+        Параметры со значениями по умолчанию - такие же, как у запроса без параметров
+
+        :param values: переопределяемые значения (по именам аргументов конструктора)
+        :return: параметры запроса
+        """
+        params = {name: i.default.default for name, i in inspect.signature(cls).parameters.items()}
+
+        return cls(**{**params, **values})
+
+
+class PageInfo(Model):
+    """
+    Информация о странице списка объектов, полученная из источника данных
+    """
+    rows_number: Optional[int]
+    has_next: Optional[bool]
+    next_cursor: Optional[str]
+
 
 class ListModel(Model):
     """
@@ -69,11 +148,20 @@ class ListModel(Model):
     rows_per_page: Optional[int]
     page: Optional[int]
     rows_number: Optional[int]
+    has_next: Optional[bool]
+    next_cursor: Optional[str]
     data: List[ListElement]
     sort_by: str = 'uuid'
     descending: bool = False
 
 
+class IdsBatch(Model):
+    """
+    Набор идентификаторов для пакетного получения объектов
+    """
+    ids: List[str] = Field(..., min_items=1, max_items=100)
+
+
 class Named(IdMixin):
     name: str
 
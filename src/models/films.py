@@ -51,8 +51,18 @@ class GetMultiQueryParamFilms(GetMultiQueryParam):
             descending: bool = Query(
                 default=True,
                 description='Использовать ли обратный порядок сортировки'
-            )
+            ),
+            with_total: bool = Query(
+                default=True,
+                alias='page[total]',
+                description='Подсчитывать ли общее количество объектов (без подсчёта возвращается только has_next)'
+            ),
+            cursor: Optional[str] = Query(
+                default=None,
+                alias='page[cursor]',
+                description='Курсор следующей страницы (next_cursor из предыдущего ответа), заменяет номер страницы'
+            ),
     ):
-        super().__init__(page=page, rows_per_page=rows_per_page)
+        super().__init__(page=page, rows_per_page=rows_per_page, with_total=with_total, cursor=cursor)
         self.sort_by = sort_by
         self.descending = descending
@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import hashlib
+import time
+from functools import lru_cache
+from typing import Optional
+
+import aiohttp
+import orjson
+from aiohttp import ClientSession
+from fastapi import Depends
+from pydantic import ValidationError
+
+from core import metrics
+from core.config import envs
+from core.exceptions import NotAuthorized, TokenVerificationUnavailable
+from core.logger import get_logger
+from db.http_client import get_http_client
+from db.memory import MemoryCache
+from db.redis import RedisCache, get_redis
+from models.auth import UserInfoJWT
+from services.jwt_verifier import JwtVerifier
+from services.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+
+class AuthService:
+    """
+    Проверка токенов во внешнем сервисе авторизации.
+
+    Если задан verifier, то токен сначала проверяется локально (подпись, срок действия), а во внешний сервис
+    запрос уходит только когда локальная проверка невозможна (нет ключа, неподдерживаемый алгоритм и т.п.).
+
+    Результаты проверки кэшируются в памяти процесса и в Redis (по хэшу токена, не дольше срока действия токена),
+    а одновременные проверки одного и того же токена объединяются в один запрос.
+    """
+    KEY_PREFIX = 'auth:token'
+
+    def __init__(
+            self,
+            http_client: ClientSession,
+            cache_service: RedisCache,
+            url: str,
+            cache_seconds: int,
+            local_cache: Optional[MemoryCache] = None,
+            single_flight: Optional[SingleFlight] = None,
+            verifier: Optional[JwtVerifier] = None,
+    ):
+        self.http_client = http_client
+        self.cache_service = cache_service
+        self.url = url
+        self.cache_seconds = cache_seconds
+        self.local_cache = local_cache or MemoryCache(
+            max_size=envs.external.auth_local_cache_size,
+            ttl_seconds=cache_seconds,
+            name=self.__class__.__name__,
+        )
+        self.single_flight = single_flight or SingleFlight(self.__class__.__name__)
+        self.verifier = verifier
+
+    async def validate(self, token: str) -> UserInfoJWT:
+        """
+        Получение данных пользователя по токену
+
+        :param token: JWT токен пользователя
+        :return: данные пользователя из токена
+        """
+        key = self._generate_key(token)
+        result = self.local_cache.get(key)
+        if result:
+            return result
+
+        return await self.single_flight.do(key, lambda: self._validate_and_cache(key, token))
+
+    async def _validate_and_cache(self, key: str, token: str) -> UserInfoJWT:
+        cache_seconds = self._cache_seconds(token)
+        result = await self._validate_local(token)
+        if result is None:
+            result = await self._validate_shared(key, token, cache_seconds)
+
+        if cache_seconds > 0:
+            self.local_cache.set(key, result, ttl_seconds=cache_seconds)
+
+        return result
+
+    async def _validate_shared(self, key: str, token: str, cache_seconds: int) -> UserInfoJWT:
+        """
+        Проверка токена во внешнем сервисе с кэшированием результата в Redis (общем для всех воркеров)
+        """
+        data = await self.cache_service.get(key)
+        if data:
+            return UserInfoJWT(**data)
+
+        result = await self._validate_remote(token)
+        if cache_seconds > 0:
+            await self.cache_service.set(key, result.dict(), expire_time_seconds=cache_seconds)
+
+        return result
+
+    async def _validate_local(self, token: str) -> Optional[UserInfoJWT]:
+        """
+        Локальная проверка токена
+
+        :return: данные пользователя или None, если токен невозможно проверить локально
+        """
+        if self.verifier is None:
+            return None
+
+        try:
+            payload = await self.verifier.verify(token)
+            return UserInfoJWT(**payload)
+        except (TokenVerificationUnavailable, ValidationError) as e:
+            logger.debug('Токен проверяется в сервисе авторизации: %r', e)
+            return None
+
+    async def _validate_remote(self, token: str) -> UserInfoJWT:
+        started = time.perf_counter()
+        result = 'error'
+        try:
+            async with self.http_client.post(self.url, json={'token': token}) as response:
+                if response.status != 200:
+                    result = 'rejected'
+                    raise NotAuthorized('Токен не прошёл проверку')
+
+                data = await response.json(loads=orjson.loads)
+                result = 'ok'
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            # недоступен, не ответил за таймаут или вернул некорректный JSON
+            raise NotAuthorized('Сервис авторизации недоступен')
+        finally:
+            metrics.AUTH_LATENCY.labels(result).observe(time.perf_counter() - started)
+
+        try:
+            return UserInfoJWT(**data)
+        except (ValidationError, TypeError):
+            raise NotAuthorized('Токен не прошёл проверку')
+
+    def _cache_seconds(self, token: str) -> int:
+        """
+        Время кэширования результата проверки: не больше настроек и не дольше срока действия токена
+        """
+        expires_at = self._token_expires_at(token)
+        if expires_at is None:
+            return self.cache_seconds
+
+        return min(self.cache_seconds, int(expires_at - time.time()))
+
+    def _token_expires_at(self, token: str) -> Optional[float]:
+        """
+        Срок действия токена из его payload (подпись здесь не проверяется - это делает сервис авторизации)
+        """
+        try:
+            payload = token.split('.')[1]
+            payload = orjson.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+            return float(payload['exp'])
+        except (IndexError, ValueError, TypeError, KeyError):
+            return None
+
+    def _generate_key(self, token: str) -> str:
+        return f'{self.KEY_PREFIX}:{hashlib.sha256(token.encode()).hexdigest()}'
+
+
+@lru_cache
+def get_auth_service(
+        http_client: ClientSession = Depends(get_http_client),
+        redis: RedisCache = Depends(get_redis),
+) -> AuthService:
+    return AuthService(
+        http_client=http_client,
+        cache_service=redis,
+        url=envs.external.auth,
+        cache_seconds=envs.external.auth_cache_seconds,
+        verifier=get_jwt_verifier(http_client) if envs.external.auth_local_verification else None,
+    )
+
+
+def get_jwt_verifier(http_client: ClientSession) -> JwtVerifier:
+    secret = envs.external.auth_jwt_secret
+    return JwtVerifier(
+        http_client=http_client,
+        secret=secret.get_secret_value() if secret else None,
+        jwks_url=envs.external.auth_jwks_url,
+        jwks_cache_seconds=envs.external.auth_jwks_cache_seconds,
+        leeway_seconds=envs.external.auth_jwt_leeway_seconds,
+    )
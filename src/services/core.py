@@ -1,28 +1,55 @@
-from typing import List, Optional, Set, Tuple, Type, TypeVar
+import asyncio
+import base64
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Type, TypeVar
 
 import elasticsearch
 import fastapi
-from elasticsearch import AsyncElasticsearch
+import orjson
 
+from core import metrics, timing
+from core.config import envs
 from core.constants import ElasticIndexes
+from core.logger import get_logger
+from db.elastic import ElasticBackend
+from db.envelope import CacheEntry, pack_entry, unpack_entry
+from db.generations import IndexGenerations
+from db.keys import bounded, digest, normalize_text
+from db.memory import MemoryCache
 from db.redis import RedisCache
-from models.core import GetMultiQueryParam, Model
+from models.core import GetMultiQueryParam, Model, PageInfo, construct_trusted, model_source_fields
 from models.params import Filters, Search
+from services.singleflight import Loader, RedisLockSingleFlight, SingleFlight
 
 ModelType: Model = TypeVar('ModelType')
 Id: str = TypeVar('Id')
 
+logger = get_logger(__name__)
+
 
 class ElasticServiceBase:
+    # части ответов Elasticsearch, которые читает сервис (остальное не передаётся - filter_path)
+    GET_FILTER_PATH = ('_id', '_source')
+    MGET_FILTER_PATH = ('docs._id', 'docs._source', 'docs.found')
+    SEARCH_FILTER_PATH = ('took', 'hits.total', 'hits.hits._source', 'hits.hits.sort')
+    EXPORT_FILTER_PATH = ('took', 'pit_id', 'hits.hits._source', 'hits.hits.sort')
+
     def __init__(
             self,
             model: Type[ModelType],
             index: ElasticIndexes,
-            db_service: AsyncElasticsearch
+            db_service: ElasticBackend,
+            trusted_source: Optional[bool] = None,
+            validation_sample_rate: Optional[float] = None,
     ):
         self.model = model
         self.index = index.value
         self.db = db_service
+        self.trusted_source = trusted_source if trusted_source is not None else envs.elastic.trusted_source
+        self.validation_sample_rate = (
+            validation_sample_rate if validation_sample_rate is not None else envs.elastic.validation_sample_rate
+        )
 
     async def get(
             self,
@@ -40,16 +67,108 @@ class ElasticServiceBase:
         """
         model = model or self.model
         try:
-            obj: dict = (await self.db.get(index=self.index, id=_id, _source_includes=exclude_fields)).get(
-                '_source'
-            )
+            obj: dict = (
+                await self._execute('get', self.db.get(
+                    self.index,
+                    _id,
+                    source_includes=self._source_includes(model, exclude_fields),
+                    filter_path=self.GET_FILTER_PATH,
+                ))
+            ).get('_source')
         except elasticsearch.NotFoundError:
             raise fastapi.HTTPException(404, f'Объект с идентификатором {_id} не найден')
 
-        result = model(**obj)
+        result = self._build_model(model, obj)
 
         return result
 
+    async def get_many(
+            self,
+            ids: List[Id],
+            model: Optional[ModelType] = None,
+            exclude_fields: Optional[Set[str]] = None
+    ) -> List[Model]:
+        """
+        Получение нескольких объектов из источника данных одним запросом (mget)
+
+        :param ids: идентификаторы получаемых объектов
+        :param model: pydantic-схема данных (для возможного переопределения)
+        :param exclude_fields: поля, которые нужно исключить из выходной модели
+        :return: найденные объекты в порядке переданных идентификаторов (ненайденные пропускаются)
+        """
+        results = await self._get_many_by_id(ids, model, exclude_fields)
+
+        return [results[_id] for _id in ids if _id in results]
+
+    async def _get_many_by_id(
+            self,
+            ids: List[Id],
+            model: Optional[ModelType] = None,
+            exclude_fields: Optional[Set[str]] = None
+    ) -> Dict[Id, Model]:
+        if not ids:
+            return {}
+
+        model = model or self.model
+        objects = await self._execute('mget', self.db.mget(
+            self.index,
+            list(ids),
+            source_includes=self._source_includes(model, exclude_fields),
+            filter_path=self.MGET_FILTER_PATH,
+        ))
+
+        return {
+            i.get('_id'): self._build_model(model, i.get('_source')) for i in objects.get('docs', []) if i.get('found')
+        }
+
+    async def _execute(self, operation: str, request: Awaitable[dict]) -> dict:
+        """
+        Выполнение запроса к Elasticsearch с записью метрик (время запроса и took из ответа) и Server-Timing
+
+        :param operation: наименование операции (для метрик)
+        :param request: запрос
+        :return: ответ Elasticsearch
+        """
+        started = time.perf_counter()
+        try:
+            response = await request
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.ELASTIC_LATENCY.labels(self.index, operation).observe(elapsed)
+            timing.record('es', elapsed)
+
+        if 'took' in response:
+            metrics.ELASTIC_TOOK.labels(self.index, operation).observe(response['took'] / 1000)
+
+        return response
+
+    def _source_includes(self, model: Type[ModelType], exclude_fields: Optional[Set[str]] = None) -> List[str]:
+        """
+        Поля документа, которые нужно запросить из Elasticsearch для сборки модели
+
+        :param model: pydantic-схема
+        :param exclude_fields: поля, которые нужно исключить из выходной модели
+        :return: наименования полей
+        """
+        return list(model_source_fields(model, frozenset(exclude_fields or ())))
+
+    def _build_model(self, model: Type[ModelType], obj: dict) -> ModelType:
+        """
+        Преобразование документа в pydantic-схему.
+
+        Если источник данных доверенный (индекс наполняется нашим ETL), то модель собирается без валидации,
+        а полноценно проверяется только доля документов validation_sample_rate - чтобы расхождение схемы
+        индекса и моделей всё равно было замечено.
+
+        :param model: pydantic-схема
+        :param obj: документ
+        :return: объект модели
+        """
+        if not self.trusted_source or random.random() < self.validation_sample_rate:
+            return model(**obj)
+
+        return construct_trusted(model, obj)
+
     def _exclude_fields(self, obj: dict, field_names: Optional[Set[str]] = None) -> dict:
         """
         Исключение полей из результата запроса
@@ -67,6 +186,8 @@ class ElasticServiceBase:
 
 
 class ElasticServicePaginatedBase(ElasticServiceBase):
+    TIEBREAKER_FIELD = 'id'
+
     async def get_multi(
             self,
             query_params: GetMultiQueryParam,
@@ -74,44 +195,202 @@ class ElasticServicePaginatedBase(ElasticServiceBase):
             filters: Optional[Filters] = None,
             model: Optional[ModelType] = None,
             **params
-    ) -> Tuple[List[ModelType], Optional[int]]:
+    ) -> Tuple[List[ModelType], PageInfo]:
         """
         Получение списка объектов
 
+        Если в параметрах пагинации отключён подсчёт общего количества (with_total), то Elasticsearch не
+        подсчитывает совпадения, а запрашивается на один объект больше, чтобы определить наличие следующей страницы.
+        Если передан курсор, то страница запрашивается через search_after (без from), что не дорожает с глубиной.
+
         :param query_params: параметры пагинации
         :param search: значения для поиска
         :param filters: значения для фильтрации
         :param model: pydantic-схема для переопределения типа выходной модели
         :param params: дополнительные параметры
-        :return: список объектов и общее количество объектов по запросу
+        :return: список объектов и информация о странице (общее количество объектов, наличие следующей страницы)
         """
         model = model or self.model
-        total_index_docs_count = (await self.db.count(index=self.index)).get('count')
 
-        get_multi_params = self._pack_get_multi_params(query_params, total_index_docs_count, **params)
+        get_multi_params = {
+            **self._pack_get_multi_params(query_params, **params),
+            '_source_includes': ','.join(self._source_includes(model)),
+            'filter_path': ','.join(self.SEARCH_FILTER_PATH),
+        }
 
         search_params = self._pack_search_params(search, filters)
+        if query_params.cursor:
+            search_params = {**search_params, 'search_after': self._decode_cursor(query_params)}
 
-        objects = await self.db.search(index=self.index, body=search_params, params=get_multi_params)
+        objects = await self._execute(
+            'search', self.db.search(index=self.index, body=search_params, params=get_multi_params)
+        )
 
-        count = objects.get('hits', {}).get('total', {}).get('value', 0)
-        objects = objects.get('hits', {}).get('hits', [])
+        hits = objects.get('hits', {})
+        objects = hits.get('hits', [])
 
-        results = [model(**i.get('_source')) for i in objects]
+        count = hits.get('total', {}).get('value', 0) if query_params.with_total else None
+        if self._is_probing(query_params):
+            has_next = bool(query_params.rows_per_page) and len(objects) > query_params.rows_per_page
+            objects = objects[:query_params.rows_per_page] if query_params.rows_per_page else objects
+        else:
+            has_next = bool(query_params.rows_per_page) and query_params.page * query_params.rows_per_page < count
 
-        return results, count
+        next_cursor = self._encode_cursor(query_params, objects[-1].get('sort')) if has_next and objects else None
+        page_info = PageInfo(rows_number=count, has_next=has_next, next_cursor=next_cursor)
 
-    def _pack_get_multi_params(self, query_params: GetMultiQueryParam, total_count: int, **params) -> dict:
-        order = 'desc' if query_params.descending else 'asc'
-        sort_by = f'{query_params.sort_by}:{order}'
-        size = query_params.rows_per_page if query_params.rows_per_page != 0 else total_count
+        results = [self._build_model(model, i.get('_source')) for i in objects]
 
-        return {
+        return results, page_info
+
+    def _pack_get_multi_params(self, query_params: GetMultiQueryParam, **params) -> dict:
+        """
+        Формирование параметров пагинации и сортировки для Elasticsearch
+
+        При rows_per_page = 0 запрашиваются все объекты в пределах max_result_window индекса. Без подсчёта общего
+        количества страница на границе max_result_window считается последней.
+        Сортировка всегда дополняется полем id, чтобы порядок был стабильным для курсорной пагинации.
+
+        :param query_params: параметры пагинации
+        :param params: дополнительные параметры
+        :return: параметры запроса
+        """
+        size = query_params.rows_per_page or envs.elastic.max_result_window
+        result = {
             'size': size,
-            'from': (query_params.page - 1) * (query_params.rows_per_page or 0),
-            'sort': sort_by,
+            'sort': self._sort_spec(query_params),
+        }
+
+        if not query_params.cursor:
+            result['from'] = (query_params.page - 1) * (query_params.rows_per_page or 0)
+
+        if not query_params.with_total:
+            result['track_total_hits'] = 'false'
+
+        # лишний объект (признак следующей страницы) запрашивается только в пределах max_result_window: иначе
+        # Elasticsearch отклонит запрос последней доступной страницы, а следующая за ней всё равно недоступна
+        window = result.get('from', 0) + size < envs.elastic.max_result_window
+        if self._is_probing(query_params) and query_params.rows_per_page and window:
+            result['size'] = size + 1
+
+        return result
+
+    def _sort_spec(self, query_params: GetMultiQueryParam) -> str:
+        order = 'desc' if query_params.descending else 'asc'
+        sort_by = [f'{query_params.sort_by}:{order}']
+        if query_params.sort_by != self.TIEBREAKER_FIELD:
+            sort_by.append(f'{self.TIEBREAKER_FIELD}:asc')
+
+        return ','.join(sort_by)
+
+    def _is_probing(self, query_params: GetMultiQueryParam) -> bool:
+        """
+        Определять ли наличие следующей страницы запросом лишнего объекта (а не по общему количеству)
+        """
+        return not query_params.with_total or bool(query_params.cursor)
+
+    def _encode_cursor(self, query_params: GetMultiQueryParam, sort_values: Optional[list]) -> Optional[str]:
+        """
+        Формирование курсора следующей страницы (значения сортировки последнего объекта для search_after)
+
+        :param query_params: параметры пагинации
+        :param sort_values: значения сортировки последнего объекта страницы
+        :return: непрозрачный для клиента курсор
+        """
+        if not sort_values:
+            return None
+
+        cursor = orjson.dumps({'sort': self._sort_spec(query_params), 'after': sort_values})
+
+        return base64.urlsafe_b64encode(cursor).decode().rstrip('=')
+
+    def _decode_cursor(self, query_params: GetMultiQueryParam) -> list:
+        """
+        Разбор курсора, переданного клиентом
+
+        :param query_params: параметры пагинации с курсором
+        :return: значения для search_after
+        """
+        try:
+            cursor = query_params.cursor
+            cursor = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            sort_spec, search_after = cursor['sort'], cursor['after']
+        except (ValueError, TypeError, KeyError):
+            raise fastapi.HTTPException(400, 'Некорректный курсор страницы')
+
+        if sort_spec != self._sort_spec(query_params) or not isinstance(search_after, list):
+            raise fastapi.HTTPException(400, 'Курсор страницы не соответствует параметрам сортировки')
+
+        return search_after
+
+    async def export(
+            self,
+            model: Optional[ModelType] = None,
+            batch_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Выгрузка всего индекса в формате NDJSON (по объекту на строку).
+
+        Индекс обходится пачками через point-in-time и search_after, поэтому расход памяти не зависит от размера
+        индекса. Если point-in-time не поддерживается кластером - обход выполняется по индексу без него.
+
+        :param model: pydantic-схема выгружаемых объектов
+        :param batch_size: количество объектов, запрашиваемых из Elasticsearch за раз
+        :return: асинхронный генератор пачек строк NDJSON
+        """
+        model = model or self.model
+        batch_size = batch_size or envs.elastic.export_batch_size
+        pit_id = await self._open_point_in_time()
+        search_after = None
+        params = {
+            '_source_includes': ','.join(self._source_includes(model)),
+            'filter_path': ','.join(self.EXPORT_FILTER_PATH),
         }
 
+        try:
+            while True:
+                body = {'size': batch_size, 'sort': [{self.TIEBREAKER_FIELD: 'asc'}]}
+                if search_after:
+                    body['search_after'] = search_after
+
+                if pit_id:
+                    body['pit'] = {'id': pit_id, 'keep_alive': envs.elastic.export_keep_alive}
+                    objects = await self._execute('export', self.db.search(body=body, params=params))
+                    pit_id = objects.get('pit_id', pit_id)
+                else:
+                    objects = await self._execute('export', self.db.search(index=self.index, body=body, params=params))
+
+                objects = objects.get('hits', {}).get('hits', [])
+                if not objects:
+                    break
+
+                yield b''.join(
+                    orjson.dumps(self._build_model(model, i.get('_source')).dict(by_alias=True)) + b'\n'
+                    for i in objects
+                )
+
+                if len(objects) < batch_size:
+                    break
+                search_after = objects[-1].get('sort')
+        finally:
+            await self._close_point_in_time(pit_id)
+
+    async def _open_point_in_time(self) -> Optional[str]:
+        try:
+            return await self.db.open_point_in_time(self.index, envs.elastic.export_keep_alive)
+        except elasticsearch.TransportError as e:
+            logger.warning('Не удалось открыть point-in-time для индекса %s: %r', self.index, e)
+            return None
+
+    async def _close_point_in_time(self, pit_id: Optional[str]) -> None:
+        if not pit_id:
+            return
+
+        try:
+            await self.db.close_point_in_time(pit_id)
+        except elasticsearch.TransportError as e:
+            logger.warning('Не удалось закрыть point-in-time для индекса %s: %r', self.index, e)
+
     def _pack_search_params(self, search: Optional[Search], filters: Optional[Filters]) -> Optional[dict]:
         """
         Формирование объекта для поиска в Elasticsearch
@@ -123,7 +402,7 @@ class ElasticServicePaginatedBase(ElasticServiceBase):
         filtering = [{'fuzzy': {i.field: i.value}} for i in filters.values] if filters else None
         filtering = {'filter': filtering} if filtering else {}
 
-        matches = {i.field: i.value for i in search.values} if search else {}
+        matches = {i.field: normalize_text(i.value) for i in search.values} if search else {}
         search_param = {
             'must': {
                 'match': {
@@ -146,10 +425,52 @@ class ElasticServicePaginatedBase(ElasticServiceBase):
 
 
 class CachedElasticPaginated(ElasticServicePaginatedBase):
-    def __init__(self, cache_service: RedisCache, expired_data_seconds: int, *args, **kwargs):
+    def __init__(
+            self,
+            cache_service: RedisCache,
+            expired_data_seconds: int,
+            *args,
+            single_flight: Optional[SingleFlight] = None,
+            local_cache: Optional[MemoryCache] = None,
+            stale_data_seconds: Optional[int] = None,
+            generations: Optional[IndexGenerations] = None,
+            cache_namespace: Optional[str] = None,
+            **kwargs
+    ):
         self.cache_service = cache_service
         self.expired_data_seconds = expired_data_seconds
+        self.stale_data_seconds = (
+            stale_data_seconds if stale_data_seconds is not None else envs.cache.stale_data_seconds
+        )
+        self._refreshing: Dict[str, asyncio.Future] = {}
+        self.single_flight = single_flight or self._default_single_flight()
+        self.local_cache = local_cache or self._default_local_cache()
+        self.generations = generations or IndexGenerations(
+            self.cache_service.storage, check_seconds=envs.cache.generation_check_seconds
+        )
         super().__init__(*args, **kwargs)
+        self.cache_namespace = cache_namespace or self.index
+
+    def _default_single_flight(self) -> SingleFlight:
+        if envs.cache.single_flight_redis_lock:
+            return RedisLockSingleFlight(
+                self.cache_service.storage,
+                lock_timeout_ms=envs.cache.single_flight_lock_timeout_ms,
+                poll_interval_ms=envs.cache.single_flight_poll_interval_ms,
+                name=self.__class__.__name__,
+            )
+
+        return SingleFlight(self.__class__.__name__)
+
+    def _default_local_cache(self) -> Optional[MemoryCache]:
+        if not envs.cache.local_enabled:
+            return None
+
+        return MemoryCache(
+            max_size=envs.cache.local_max_size,
+            ttl_seconds=envs.cache.local_ttl_seconds,
+            name=self.__class__.__name__,
+        )
 
     async def get(
             self,
@@ -157,14 +478,75 @@ class CachedElasticPaginated(ElasticServicePaginatedBase):
             model: Optional[ModelType] = None,
             exclude_fields: Optional[Set[str]] = None
     ) -> Optional[Model]:
-        key = self._generate_simple_key(str(self.__class__), _id)
-        obj = await self.cache_service.get(key)
-        if not obj:
-            obj = await super().get(_id, model, exclude_fields)
-            if obj:
-                await self.cache_service.set(key, obj.dict(), expire_time_seconds=self.expired_data_seconds)
+        model = model or self.model
+        key = self._generate_object_key(_id, model, await self.get_generation())
+
+        return await self._get_cached(
+            key,
+            model,
+            loader=lambda: super(CachedElasticPaginated, self).get(_id, model, exclude_fields),
+            pack=self._pack_object,
+            unpack=lambda data: self._build_cached_model(model, data),
+        )
+
+    async def get_many(
+            self,
+            ids: List[Id],
+            model: Optional[ModelType] = None,
+            exclude_fields: Optional[Set[str]] = None
+    ) -> List[Model]:
+        """
+        Получение нескольких объектов через кэш.
+
+        Объекты ищутся в локальном кэше, затем одной командой MGET в Redis, а отсутствующие в кэше запрашиваются
+        одним mget из Elasticsearch и сохраняются в Redis одним pipeline.
+        """
+        model = model or self.model
+        ids = list(dict.fromkeys(ids))
+        generation = await self.get_generation()
+        keys = {_id: self._generate_object_key(_id, model, generation) for _id in ids}
+        results = {}
+
+        for _id, key in keys.items():
+            value = self._local_get(key)
+            if value:
+                results[_id] = value
+                self._count_cache_request('local_hit')
+
+        missing = [_id for _id in ids if _id not in results]
+        entries = await self._read_cache(self.cache_service.get_many_raw([keys[_id] for _id in missing]))
+        for _id, raw in zip(missing, entries):
+            entry = unpack_entry(model, raw)
+            if entry is None:
+                self._count_cache_request('miss')
+                continue
+
+            results[_id] = self._build_cached_model(model, entry.data)
+            stale = self._is_stale(entry)
+            self._count_cache_request('stale' if stale else 'hit')
+            if stale:
+                self._schedule_refresh(
+                    keys[_id],
+                    model,
+                    lambda _id=_id: super(CachedElasticPaginated, self).get(_id, model, exclude_fields),
+                    self._pack_object,
+                )
+            else:
+                self._local_set(keys[_id], results[_id])
+
+        missing = [_id for _id in ids if _id not in results]
+        if missing:
+            loaded = await self._get_many_by_id(missing, model, exclude_fields)
+            created_at = time.time()
+            await self.cache_service.set_many_raw(
+                {keys[_id]: pack_entry(model, self._pack_object(obj), created_at) for _id, obj in loaded.items()},
+                expire_time_seconds=self.expired_data_seconds + self.stale_data_seconds
+            )
+            for _id, obj in loaded.items():
+                self._local_set(keys[_id], obj)
+            results.update(loaded)
 
-        return obj
+        return [results[_id] for _id in ids if _id in results]
 
     async def get_multi(
             self,
@@ -173,54 +555,230 @@ class CachedElasticPaginated(ElasticServicePaginatedBase):
             filters: Optional[Filters] = None,
             model: Optional[ModelType] = None,
             **params
-    ) -> Tuple[List[ModelType], Optional[int]]:
-        multi_cache_key = self._generate_multi_key(query_params, search, filters)
-        result = await self.cache_service.get(multi_cache_key, default=[])
-        count = len(result)
-
-        if not result:
-            result, count = await super().get_multi(query_params, search, filters, model, **params)
-
-            if result:
-                result_data = [i.dict() for i in result]
-                await self.cache_service.set(
-                    multi_cache_key,
-                    result_data,
-                    expire_time_seconds=self.expired_data_seconds
-                )
+    ) -> Tuple[List[ModelType], PageInfo]:
+        model = model or self.model
+        multi_cache_key = self._generate_multi_key(query_params, model, await self.get_generation(), search, filters)
+
+        return await self._get_cached(
+            multi_cache_key,
+            model,
+            loader=lambda: super(CachedElasticPaginated, self).get_multi(
+                query_params, search, filters, model, **params
+            ),
+            pack=lambda value: {'data': [i.dict() for i in value[0]], 'page': value[1].dict()} if value[0] else None,
+            unpack=lambda data: (
+                [self._build_cached_model(model, i) for i in data['data']], PageInfo.construct(**data['page'])
+            ),
+        )
+
+    async def _get_cached(
+            self,
+            key: str,
+            model: Type[ModelType],
+            loader: Loader,
+            pack: Callable,
+            unpack: Callable
+    ) -> Any:
+        """
+        Чтение данных через кэш: локальный кэш -> Redis -> источник данных.
 
-        return result, count
+        Если данные в Redis старше expired_data_seconds, но ещё не удалены (stale_data_seconds), то они
+        возвращаются сразу, а обновление из источника выполняется в фоне.
+
+        :param key: ключ в кэше
+        :param model: pydantic-схема данных (её версия хранится в записи кэша)
+        :param loader: функция загрузки данных из источника
+        :param pack: преобразование загруженных данных в формат кэша (None - данные не кэшируются)
+        :param unpack: преобразование данных из кэша в выходной формат
+        :return: данные в выходном формате
+        """
+        value = self._local_get(key)
+        if value:
+            self._count_cache_request('local_hit')
+            return value
+
+        entry = unpack_entry(model, await self._read_cache(self.cache_service.get_raw(key)))
+        if entry is not None:
+            value = unpack(entry.data)
+            if self._is_stale(entry):
+                self._count_cache_request('stale')
+                self._schedule_refresh(key, model, loader, pack)
+            else:
+                self._count_cache_request('hit')
+                if entry.data:
+                    self._local_set(key, value)
+
+            return value
+
+        self._count_cache_request('miss')
+        return await self.single_flight.do(
+            key,
+            lambda: self._load_and_cache(key, model, loader, pack),
+            lookup=lambda: self._lookup(key, model, unpack),
+        )
+
+    async def _read_cache(self, request: Awaitable[Any]) -> Any:
+        """Чтение из Redis с записью времени чтения в метрики"""
+        started = time.perf_counter()
+        try:
+            return await request
+        finally:
+            metrics.CACHE_LATENCY.labels(self.__class__.__name__).observe(time.perf_counter() - started)
+
+    def _count_cache_request(self, result: str) -> None:
+        metrics.CACHE_REQUESTS.labels(self.__class__.__name__, result).inc()
+
+    def _pack_object(self, obj: Optional[Model]) -> Optional[dict]:
+        return obj.dict() if obj else None
+
+    async def _load_and_cache(self, key: str, model: Type[ModelType], loader: Loader, pack: Callable) -> Any:
+        value = await loader()
+        data = pack(value)
+        if data:
+            await self.cache_service.set_raw(
+                key,
+                pack_entry(model, data),
+                expire_time_seconds=self.expired_data_seconds + self.stale_data_seconds
+            )
+            self._local_set(key, value)
+
+        return value
+
+    def _build_cached_model(self, model: Type[ModelType], data: dict) -> ModelType:
+        """
+        Сборка модели из записи кэша - без валидации, независимо от trusted_source: версия схемы в записи
+        гарантирует, что данные записаны из уже проверенного объекта этой же модели
+
+        :param model: pydantic-схема
+        :param data: данные из записи кэша
+        :return: объект модели
+        """
+        return construct_trusted(model, data)
+
+    async def _lookup(self, key: str, model: Type[ModelType], unpack: Callable) -> Any:
+        entry = unpack_entry(model, await self.cache_service.get_raw(key))
+        if entry is None:
+            return None
+
+        return unpack(entry.data)
+
+    def _is_stale(self, entry: CacheEntry) -> bool:
+        if not self.stale_data_seconds:
+            return False
+
+        return time.time() - entry.created_at >= self.expired_data_seconds
+
+    def _schedule_refresh(self, key: str, model: Type[ModelType], loader: Loader, pack: Callable) -> None:
+        """Фоновое обновление устаревших данных (не более одного обновления на ключ одновременно)"""
+        if key in self._refreshing:
+            return
+
+        task = asyncio.ensure_future(
+            self.single_flight.do(key, lambda: self._load_and_cache(key, model, loader, pack))
+        )
+        task.add_done_callback(lambda t: self._refresh_done(key, t))
+        self._refreshing[key] = task
+
+    def _refresh_done(self, key: str, task: asyncio.Future) -> None:
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception():
+            logger.warning('Не удалось обновить данные в кэше по ключу %s: %r', key, task.exception())
+
+    def _local_get(self, key: str) -> Any:
+        if self.local_cache is None:
+            return None
+
+        return self.local_cache.get(key)
+
+    def _local_set(self, key: str, value: Any) -> None:
+        """
+        Сохранение в локальный кэш. Сохраняются только данные, которые пишутся и в Redis (pack вернул
+        непустой результат): пустые страницы списков и отсутствующие объекты не кэшируются ни на одном уровне
+        """
+        if self.local_cache is not None:
+            self.local_cache.set(key, value, ttl_seconds=self.expired_data_seconds)
+
+    async def get_generation(self) -> int:
+        """
+        Текущий номер поколения индекса сервиса (входит в ключи кэша)
+
+        :return: номер поколения
+        """
+        return await self.generations.get(self.index)
+
+    async def invalidate(self) -> int:
+        """
+        Инвалидация всего кэша индекса сервиса одной командой INCR (например, после переиндексации).
+        Старые записи больше не читаются и удаляются из Redis по истечении TTL.
+
+        :return: новый номер поколения
+        """
+        generation = await self.generations.bump(self.index)
+        self.invalidate_local()
+
+        return generation
+
+    def invalidate_local(self, key: Optional[str] = None) -> None:
+        """
+        Сброс локального (in-process) кэша
+
+        :param key: ключ, по которому нужно сбросить данные (если не указан - сбрасывается весь кэш сервиса)
+        """
+        if self.local_cache is None:
+            return
+
+        if key is None:
+            self.local_cache.clear()
+        else:
+            self.local_cache.invalidate(key)
 
     def _generate_multi_key(
             self,
             query_params: GetMultiQueryParam,
+            model: Type[ModelType],
+            generation: int,
             search: Optional[Search] = None,
             filters: Optional[Filters] = None,
     ) -> str:
         """
-        Генерация ключа в кэше для списка объектов
+        Генерация ключа в кэше для списка объектов.
+
+        Параметры запроса приводятся к каноническому виду (поисковые значения нормализуются так же, как перед
+        отправкой в Elasticsearch, параметры сортируются) и заменяются хэшем фиксированной длины.
 
         :param query_params: параметры запроса
+        :param model: pydantic-схема объектов
+        :param generation: номер поколения индекса
         :param search: параметры поиска в запросе
         :param filters: параметры фильтрации в запросе
         :return: ключ в виде строки
         """
-        key_params = [
-            str(self.__class__),
-            str(query_params.page),
-            str(query_params.rows_per_page),
-            query_params.sort_by,
-            str(query_params.descending),
-        ]
+        key_params = {
+            'page': query_params.page,
+            'rows': query_params.rows_per_page,
+            'sort_by': query_params.sort_by,
+            'descending': query_params.descending,
+            'with_total': query_params.with_total,
+            'cursor': query_params.cursor,
+            # значения фильтров не нормализуются: фильтрация по keyword-полям чувствительна к регистру
+            'search': sorted([i.field, normalize_text(i.value)] for i in search.values) if search else [],
+            'filters': sorted([i.field, str(i.value)] for i in filters.values) if filters else [],
+        }
 
-        additional_key_params = lambda param: [f'{i.field}:{i.value}' for i in param.values]
-        search_params = additional_key_params(search) if search else []
-        filter_params = additional_key_params(filters) if filters else []
+        return self._generate_simple_key(
+            self.cache_namespace, str(generation), model.__name__, 'list', digest(key_params)
+        )
 
-        result_params = key_params + search_params + filter_params
-        result = self._generate_simple_key(*result_params)
+    def _generate_object_key(self, _id: Id, model: Type[ModelType], generation: int) -> str:
+        """
+        Генерация ключа в кэше для единичного объекта по его идентификатору
 
-        return result
+        :param _id: идентификатор объекта
+        :param model: pydantic-схема объекта
+        :param generation: номер поколения индекса
+        :return: ключ в виде строки
+        """
+        return self._generate_simple_key(self.cache_namespace, str(generation), model.__name__, bounded(str(_id)))
 
     def _generate_simple_key(self, *args) -> str:
         """
@@ -1,10 +1,9 @@
 from functools import lru_cache
 
-from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 
 from core.constants import ElasticIndexes
-from db.elastic import get_elastic
+from db.elastic import ElasticBackend, get_elastic
 from db.redis import RedisCache, get_redis
 from models.films import FilmBase
 from services.core import CachedElasticPaginated
@@ -17,7 +16,7 @@ class FilmElasticService(CachedElasticPaginated):
 @lru_cache
 def get_film_service(
         redis: RedisCache = Depends(get_redis),
-        elastic: AsyncElasticsearch = Depends(get_elastic)
+        elastic: ElasticBackend = Depends(get_elastic)
 ) -> FilmElasticService:
     return FilmElasticService(
         model=FilmBase,
@@ -1,24 +1,43 @@
 from functools import lru_cache
+from typing import Union
 
-from elasticsearch import AsyncElasticsearch
 from fastapi import Depends
 
+from core.config import envs
 from core.constants import ElasticIndexes
-from db.elastic import get_elastic
+from db.elastic import ElasticBackend, get_elastic
+from db.generations import IndexGenerations
 from db.redis import RedisCache, get_redis
 from models.genres import GenreBase
 from services.core import CachedElasticPaginated
+from services.snapshot import SnapshotElasticService
 
 
 class GenreElasticService(CachedElasticPaginated):
     pass
 
 
+class GenreSnapshotService(SnapshotElasticService):
+    pass
+
+
+GenreService = Union[GenreElasticService, GenreSnapshotService]
+
+
 @lru_cache
 def get_genre_service(
         redis: RedisCache = Depends(get_redis),
-        elastic: AsyncElasticsearch = Depends(get_elastic)
-) -> GenreElasticService:
+        elastic: ElasticBackend = Depends(get_elastic)
+) -> GenreService:
+    if ElasticIndexes.genres in envs.snapshot.indexes:
+        return GenreSnapshotService(
+            model=GenreBase,
+            index=ElasticIndexes.genres,
+            db_service=elastic,
+            generations=IndexGenerations(redis.storage, check_seconds=envs.cache.generation_check_seconds),
+            expired_data_seconds=300
+        )
+
     return GenreElasticService(
         model=GenreBase,
         index=ElasticIndexes.genres,
@@ -0,0 +1,184 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import time
+from typing import Dict, Optional, Tuple
+
+import aiohttp
+import orjson
+from aiohttp import ClientSession
+
+from core.exceptions import NotAuthorized, TokenVerificationUnavailable
+
+HMAC_ALGORITHMS = {
+    'HS256': 'sha256',
+    'HS384': 'sha384',
+    'HS512': 'sha512',
+}
+
+RSA_ALGORITHMS = {
+    'RS256': 'sha256',
+    'RS384': 'sha384',
+    'RS512': 'sha512',
+}
+
+# DER-префиксы DigestInfo для подписи RSASSA-PKCS1-v1_5 (RFC 8017, раздел 9.2)
+RSA_DIGEST_INFO_PREFIXES = {
+    'sha256': bytes.fromhex('3031300d060960864801650304020105000420'),
+    'sha384': bytes.fromhex('3041300d060960864801650304020205000430'),
+    'sha512': bytes.fromhex('3051300d060960864801650304020305000440'),
+}
+
+
+def b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + '=' * (-len(value) % 4))
+
+
+class JwtVerifier:
+    """
+    Локальная проверка JWT токенов: подпись (HS* - общим секретом, RS* - ключами из JWKS) и срок действия.
+
+    JWKS-документ кэшируется и перечитывается по истечении jwks_cache_seconds или при появлении токена,
+    подписанного неизвестным ключом (не чаще раза в минуту).
+    """
+    JWKS_MIN_REFRESH_SECONDS = 60
+
+    def __init__(
+            self,
+            http_client: Optional[ClientSession] = None,
+            secret: Optional[str] = None,
+            jwks_url: Optional[str] = None,
+            jwks_cache_seconds: int = 3600,
+            leeway_seconds: int = 30,
+    ):
+        self.http_client = http_client
+        self.secret = secret.encode() if secret else None
+        self.jwks_url = jwks_url
+        self.jwks_cache_seconds = jwks_cache_seconds
+        self.leeway_seconds = leeway_seconds
+        self._keys: Dict[Optional[str], Tuple[int, int]] = {}
+        self._keys_fetched_at = 0.0
+        self._keys_lock = asyncio.Lock()
+
+    async def verify(self, token: str) -> dict:
+        """
+        Проверка токена
+
+        :param token: JWT токен
+        :raises NotAuthorized: подпись не совпала или срок действия токена истёк
+        :raises TokenVerificationUnavailable: токен невозможно проверить локально
+        :return: payload токена
+        """
+        try:
+            header, payload, signature = token.split('.')
+            signing_input = f'{header}.{payload}'.encode()
+            header, payload = orjson.loads(b64url_decode(header)), orjson.loads(b64url_decode(payload))
+            signature = b64url_decode(signature)
+        except ValueError:
+            raise NotAuthorized('Некорректный формат токена')
+
+        if not isinstance(header, dict) or not isinstance(payload, dict):
+            raise NotAuthorized('Некорректный формат токена')
+
+        algorithm = header.get('alg')
+        if algorithm in HMAC_ALGORITHMS:
+            verified = self._verify_hmac(algorithm, signing_input, signature)
+        elif algorithm in RSA_ALGORITHMS:
+            key = await self._get_key(header.get('kid'))
+            verified = self._verify_rsa(algorithm, key, signing_input, signature)
+        else:
+            raise TokenVerificationUnavailable(f'Алгоритм {algorithm} не поддерживается')
+
+        if not verified:
+            raise NotAuthorized('Подпись токена не прошла проверку')
+
+        self._verify_claims(payload)
+
+        return payload
+
+    def _verify_claims(self, payload: dict) -> None:
+        now = time.time()
+        try:
+            if 'exp' in payload and float(payload['exp']) + self.leeway_seconds < now:
+                raise NotAuthorized('Срок действия токена истёк')
+
+            if 'nbf' in payload and float(payload['nbf']) - self.leeway_seconds > now:
+                raise NotAuthorized('Токен ещё не действителен')
+        except (TypeError, ValueError):
+            raise NotAuthorized('Некорректный формат токена')
+
+    def _verify_hmac(self, algorithm: str, signing_input: bytes, signature: bytes) -> bool:
+        if not self.secret:
+            raise TokenVerificationUnavailable('Секрет для проверки подписи не задан')
+
+        expected = hmac.new(self.secret, signing_input, HMAC_ALGORITHMS[algorithm]).digest()
+
+        return hmac.compare_digest(expected, signature)
+
+    def _verify_rsa(self, algorithm: str, key: Tuple[int, int], signing_input: bytes, signature: bytes) -> bool:
+        """
+        Проверка подписи RSASSA-PKCS1-v1_5 открытым ключом (n, e)
+        """
+        n, e = key
+        key_length = (n.bit_length() + 7) // 8
+        if len(signature) != key_length:
+            return False
+
+        hash_name = RSA_ALGORITHMS[algorithm]
+        digest_info = RSA_DIGEST_INFO_PREFIXES[hash_name] + hashlib.new(hash_name, signing_input).digest()
+        if key_length < len(digest_info) + 11:
+            return False
+
+        expected = b'\x00\x01' + b'\xff' * (key_length - len(digest_info) - 3) + b'\x00' + digest_info
+        message = pow(int.from_bytes(signature, 'big'), e, n).to_bytes(key_length, 'big')
+
+        return hmac.compare_digest(message, expected)
+
+    async def _get_key(self, kid: Optional[str]) -> Tuple[int, int]:
+        if not self.jwks_url or self.http_client is None:
+            raise TokenVerificationUnavailable('JWKS для проверки подписи не задан')
+
+        now = time.time()
+        expired = now - self._keys_fetched_at > self.jwks_cache_seconds
+        unknown = kid not in self._keys and now - self._keys_fetched_at > self.JWKS_MIN_REFRESH_SECONDS
+        if expired or unknown:
+            await self._refresh_keys()
+
+        key = self._keys.get(kid)
+        if key is None and kid is None and len(self._keys) == 1:
+            key = next(iter(self._keys.values()))
+
+        if key is None:
+            raise TokenVerificationUnavailable(f'Ключ {kid} не найден в JWKS')
+
+        return key
+
+    async def _refresh_keys(self) -> None:
+        async with self._keys_lock:
+            if time.time() - self._keys_fetched_at <= self.JWKS_MIN_REFRESH_SECONDS:
+                return
+
+            try:
+                async with self.http_client.get(self.jwks_url) as response:
+                    response.raise_for_status()
+                    jwks = await response.json(loads=orjson.loads)
+
+                keys = {
+                    i.get('kid'): (
+                        int.from_bytes(b64url_decode(i['n']), 'big'),
+                        int.from_bytes(b64url_decode(i['e']), 'big'),
+                    )
+                    for i in jwks.get('keys', [])
+                    if i.get('kty') == 'RSA' and i.get('n') and i.get('e')
+                }
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, TypeError, AttributeError) as e:
+                # сервис недоступен, не ответил за таймаут или вернул некорректный JWKS: повторная попытка -
+                # не раньше JWKS_MIN_REFRESH_SECONDS, а до тех пор работаем со старыми ключами
+                self._keys_fetched_at = time.time()
+                if not self._keys:
+                    raise TokenVerificationUnavailable(f'Не удалось получить JWKS: {e!r}')
+                return
+
+            self._keys = keys
+            self._keys_fetched_at = time.time()
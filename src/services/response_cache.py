@@ -0,0 +1,115 @@
+import hashlib
+from functools import lru_cache
+from http import HTTPStatus
+from typing import Awaitable, Callable, Optional, Type
+from urllib.parse import urlencode
+
+import orjson
+from fastapi import Depends
+from starlette.requests import Request
+from starlette.responses import Response
+
+from core import timing
+from core.config import envs
+from db.keys import digest
+from db.redis import RedisCache, get_redis
+from models.core import Model
+from services.core import CachedElasticPaginated
+
+
+class ResponseCache:
+    """
+    Кэш готовых (уже сериализованных) тел ответов.
+
+    При попадании в кэш ответ отдаётся как есть, без сборки pydantic-моделей и повторной сериализации:
+    одна команда GET в Redis и запись в сокет. Вместе с телом хранится ETag.
+
+    Ответы поддерживают условные запросы: если ETag совпадает с If-None-Match, возвращается 304 без тела.
+    ETag и Cache-Control выставляются и при отключённом кэше.
+    """
+    KEY_PREFIX = 'response'
+    ETAG_SEPARATOR = b'\n'
+
+    def __init__(self, cache_service: RedisCache, enabled: bool = True):
+        self.cache_service = cache_service
+        self.enabled = enabled
+
+    async def get_or_build(
+            self,
+            request: Request,
+            build: Callable[[], Awaitable[Model]],
+            response_model: Type[Model],
+            service: CachedElasticPaginated,
+    ):
+        """
+        Получение ответа из кэша или его формирование
+
+        :param request: текущий запрос (ключ кэша формируется из пути и параметров запроса)
+        :param build: функция формирования ответа
+        :param response_model: pydantic-схема ответа (как response_model роута)
+        :param service: сервис, данные которого содержит ответ (время жизни и поколение индекса)
+        :return: готовый ответ
+        """
+        if not self.enabled:
+            body = self._encode(await build(), response_model)
+            return self._response(request, body, self._generate_etag(body), service.expired_data_seconds)
+
+        key = self._generate_key(request, await service.get_generation())
+        cached = await self.cache_service.get_raw(key)
+        if cached:
+            etag, body = cached.split(self.ETAG_SEPARATOR, 1)
+            return self._response(request, body, etag.decode(), service.expired_data_seconds)
+
+        body = self._encode(await build(), response_model)
+        etag = self._generate_etag(body)
+        await self.cache_service.set_raw(
+            key,
+            etag.encode() + self.ETAG_SEPARATOR + body,
+            expire_time_seconds=service.expired_data_seconds
+        )
+
+        return self._response(request, body, etag, service.expired_data_seconds)
+
+    def _encode(self, value: Model, response_model: Type[Model]) -> bytes:
+        with timing.span('serialize'):
+            # то же преобразование, что выполняет FastAPI для response_model: лишние поля отбрасываются
+            value = response_model.parse_obj(value.dict(by_alias=True))
+
+            return orjson.dumps(value.dict(by_alias=True))
+
+    def _response(self, request: Request, body: bytes, etag: str, max_age: int) -> Response:
+        # все ответы v1 требуют авторизации, поэтому хранить их могут только кэши клиента
+        headers = {'ETag': etag, 'Cache-Control': f'private, max-age={max_age}'}
+        if self._etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        return Response(content=body, media_type='application/json', headers=headers)
+
+    def _etag_matches(self, if_none_match: Optional[str], etag: str) -> bool:
+        """
+        Проверка заголовка If-None-Match (слабое сравнение, RFC 7232, раздел 3.2)
+
+        :param if_none_match: значение заголовка
+        :param etag: ETag ответа
+        :return: совпадает ли ETag ответа с одним из переданных клиентом
+        """
+        if not if_none_match:
+            return False
+
+        if if_none_match.strip() == '*':
+            return True
+
+        return any(i.strip().removeprefix('W/') == etag for i in if_none_match.split(','))
+
+    def _generate_etag(self, body: bytes) -> str:
+        return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+    def _generate_key(self, request: Request, generation: int) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+
+        return f'{self.KEY_PREFIX}:{generation}:{digest(f"{request.url.path}?{query}".encode())}'
+
+
+@lru_cache
+def get_response_cache(redis: RedisCache = Depends(get_redis)) -> ResponseCache:
+    return ResponseCache(cache_service=redis, enabled=envs.cache.response_cache_enabled)
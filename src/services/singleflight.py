@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aioredis import Redis
+
+from core import metrics
+
+Loader = Callable[[], Awaitable[Any]]
+
+RELEASE_LOCK_SCRIPT = '''
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+'''
+
+
+class SingleFlight:
+    """
+    Объединение одновременных запросов за одними и теми же данными в рамках одного процесса.
+
+    Первый запрос по ключу запускает загрузку, все последующие (пока загрузка не завершилась) ожидают
+    тот же результат, не обращаясь к источнику данных повторно.
+    """
+
+    def __init__(self, name: str = 'default'):
+        """
+        :param name: наименование сервиса (метка в метриках)
+        """
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, loader: Loader, lookup: Optional[Loader] = None) -> Any:
+        """
+        Выполнение загрузки с объединением одновременных запросов
+
+        :param key: ключ, по которому объединяются запросы
+        :param loader: функция загрузки данных из источника
+        :param lookup: функция проверки, не появились ли данные в кэше (используется в распределённом варианте)
+        :return: результат загрузки
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, lookup))
+            task.add_done_callback(lambda t: self._forget(key, t))
+            self._in_flight[key] = task
+            self._count('executed')
+        else:
+            self._count('coalesced')
+
+        # shield - отмена одного из ожидающих запросов не должна отменять загрузку для остальных
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, loader: Loader, lookup: Optional[Loader]) -> Any:
+        return await loader()
+
+    def _forget(self, key: str, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+
+        # помечаем исключение как полученное, если все ожидающие запросы уже были отменены
+        if not task.cancelled():
+            task.exception()
+
+    def _count(self, result: str) -> None:
+        metrics.SINGLE_FLIGHT_REQUESTS.labels(self.name, result).inc()
+
+
+class RedisLockSingleFlight(SingleFlight):
+    """
+    Объединение запросов между несколькими процессами (воркерами gunicorn) через блокировку в Redis.
+
+    Загрузку выполняет только процесс, захвативший блокировку, остальные периодически проверяют кэш и
+    выполняют загрузку самостоятельно, если блокировка снята, а в кэше ничего не появилось (пустой результат
+    не кэшируется, загрузка завершилась ошибкой), или по истечении времени жизни блокировки.
+    """
+
+    def __init__(self, storage: Redis, lock_timeout_ms: int = 5000, poll_interval_ms: int = 50, name: str = 'default'):
+        super().__init__(name)
+        self.storage = storage
+        self.lock_timeout_ms = lock_timeout_ms
+        self.poll_interval_ms = poll_interval_ms
+
+    async def _load(self, key: str, loader: Loader, lookup: Optional[Loader]) -> Any:
+        lock_key = f'{key}:lock'
+        token = uuid.uuid4().hex
+        acquired = await self.storage.set(
+            lock_key,
+            token,
+            pexpire=self.lock_timeout_ms,
+            exist=self.storage.SET_IF_NOT_EXIST
+        )
+        if acquired:
+            try:
+                return await loader()
+            finally:
+                await self.storage.eval(RELEASE_LOCK_SCRIPT, keys=[lock_key], args=[token])
+
+        if lookup is not None:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.lock_timeout_ms / 1000
+            while loop.time() < deadline:
+                await asyncio.sleep(self.poll_interval_ms / 1000)
+                # блокировка снимается после записи в кэш, поэтому её состояние проверяется до чтения кэша
+                released = await self.storage.get(lock_key) is None
+                result = await lookup()
+                if result:
+                    self._count('remote_coalesced')
+                    return result
+
+                if released:
+                    break
+
+        return await loader()
@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import AsyncIterator, Awaitable, List, Optional, Set, Tuple
+
+from core.config import envs
+from core.logger import get_logger
+from db.elastic import ElasticBackend
+from db.generations import IndexGenerations
+from db.memory_elastic import MemoryElasticBackend
+from models.core import GetMultiQueryParam, Model, PageInfo
+from models.params import Filters, Search
+from services.core import ElasticServicePaginatedBase, Id, ModelType
+from services.singleflight import SingleFlight
+
+logger = get_logger(__name__)
+
+
+class SnapshotElasticService(ElasticServicePaginatedBase):
+    """
+    Сервис небольшого, редко изменяемого индекса, который целиком хранится в памяти процесса.
+
+    При первом обращении индекс загружается из Elasticsearch в снимок (MemoryElasticBackend), и дальше списки,
+    поиск, сортировка и получение по ID выполняются по снимку без обращений к Redis и Elasticsearch.
+    Снимок не изменяется: при обновлении загружается новый и заменяет текущий целиком.
+
+    Снимок обновляется в фоне: раз в check_seconds проверяется номер поколения индекса, и снимок загружается
+    заново после переиндексации (смены поколения) или если он старше refresh_seconds.
+    """
+
+    def __init__(
+            self,
+            generations: IndexGenerations,
+            expired_data_seconds: int,
+            *args,
+            refresh_seconds: Optional[float] = None,
+            check_seconds: Optional[float] = None,
+            **kwargs
+    ):
+        """
+        :param generations: номера поколений индексов
+        :param expired_data_seconds: время жизни ответов в кэше ответов и у клиентов
+        :param refresh_seconds: максимальный возраст снимка (0 - обновляется только при смене поколения)
+        :param check_seconds: период проверки номера поколения индекса (0 - снимок не обновляется)
+        """
+        super().__init__(*args, **kwargs)
+        self.generations = generations
+        self.expired_data_seconds = expired_data_seconds
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else envs.snapshot.refresh_seconds
+        self.check_seconds = check_seconds if check_seconds is not None else envs.snapshot.check_seconds
+        # запросы к Elasticsearch выполняются только при загрузке снимка, чтение - из снимка
+        self.source: ElasticBackend = self.db
+        self.db: Optional[MemoryElasticBackend] = None
+        self.generation: Optional[int] = None
+        self.loaded_at: Optional[float] = None
+        self._loading = SingleFlight(self.__class__.__name__)
+        self._watcher: Optional[asyncio.Future] = None
+
+    async def get(
+            self,
+            _id: Id,
+            model: Optional[ModelType] = None,
+            exclude_fields: Optional[Set[str]] = None
+    ) -> Optional[Model]:
+        await self._ensure_loaded()
+
+        return await super().get(_id, model, exclude_fields)
+
+    async def get_many(
+            self,
+            ids: List[Id],
+            model: Optional[ModelType] = None,
+            exclude_fields: Optional[Set[str]] = None
+    ) -> List[Model]:
+        await self._ensure_loaded()
+
+        return await super().get_many(ids, model, exclude_fields)
+
+    async def get_multi(
+            self,
+            query_params: GetMultiQueryParam,
+            search: Optional[Search] = None,
+            filters: Optional[Filters] = None,
+            model: Optional[ModelType] = None,
+            **params
+    ) -> Tuple[List[ModelType], PageInfo]:
+        await self._ensure_loaded()
+
+        return await super().get_multi(query_params, search, filters, model, **params)
+
+    async def export(
+            self,
+            model: Optional[ModelType] = None,
+            batch_size: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        await self._ensure_loaded()
+        async for i in super().export(model, batch_size):
+            yield i
+
+    async def get_generation(self) -> int:
+        """
+        Номер поколения индекса, из которого загружен текущий снимок
+
+        :return: номер поколения
+        """
+        await self._ensure_loaded()
+
+        return self.generation
+
+    async def refresh(self) -> None:
+        """Загрузка нового снимка индекса из Elasticsearch"""
+        generation = await self.generations.get(self.index)
+        documents = await self._load_documents()
+
+        self.db = MemoryElasticBackend({self.index: documents})
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        logger.info('Загружен снимок индекса %s: %s объектов, поколение %s', self.index, len(documents), generation)
+
+    async def invalidate(self) -> int:
+        """
+        Смена поколения индекса (например, после переиндексации) и загрузка нового снимка.
+        Снимки в других процессах обновятся при следующей проверке номера поколения.
+
+        :return: новый номер поколения
+        """
+        generation = await self.generations.bump(self.index)
+        await self._loading.do(self.index, self.refresh)
+
+        return generation
+
+    async def stop(self) -> None:
+        if self._watcher is None:
+            return
+
+        self._watcher.cancel()
+        try:
+            await self._watcher
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._watcher = None
+
+    async def _ensure_loaded(self) -> None:
+        if self.db is not None:
+            return
+
+        await self._loading.do(self.index, self.refresh)
+        if self._watcher is None and self.check_seconds:
+            self._watcher = asyncio.ensure_future(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            try:
+                if await self._is_outdated():
+                    await self._loading.do(self.index, self.refresh)
+            except Exception as e:
+                logger.warning('Не удалось обновить снимок индекса %s: %r', self.index, e)
+
+    async def _is_outdated(self) -> bool:
+        if self.refresh_seconds and time.monotonic() - self.loaded_at >= self.refresh_seconds:
+            return True
+
+        return await self.generations.get(self.index) != self.generation
+
+    async def _load_documents(self) -> List[dict]:
+        documents = []
+        search_after = None
+        while True:
+            body = {'size': envs.elastic.export_batch_size, 'sort': [{self.TIEBREAKER_FIELD: 'asc'}]}
+            if search_after:
+                body['search_after'] = search_after
+
+            objects = await super()._execute('snapshot', self.source.search(
+                index=self.index, body=body, params={'filter_path': ','.join(self.EXPORT_FILTER_PATH)}
+            ))
+            objects = objects.get('hits', {}).get('hits', [])
+            documents += [i.get('_source') for i in objects]
+
+            if len(objects) < envs.elastic.export_batch_size:
+                return documents
+            search_after = objects[-1].get('sort')
+
+    async def _execute(self, operation: str, request: Awaitable[dict]) -> dict:
+        # чтение из снимка в памяти - не запрос к Elasticsearch, в метрики Elasticsearch не записывается
+        return await request
+
+    async def _open_point_in_time(self) -> Optional[str]:
+        return None
@@ -0,0 +1,171 @@
+import asyncio
+import math
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Type
+
+from core.config import envs
+from core.logger import get_logger
+from db import elastic
+from db.redis import get_redis
+from models.core import GetMultiQueryParam, PageInfo
+from models.films import GetMultiQueryParamFilms
+from services.core import CachedElasticPaginated
+from services.films import get_film_service
+from services.genres import get_genre_service
+from services.persons import get_person_service
+
+logger = get_logger(__name__)
+
+
+class WarmupTarget(NamedTuple):
+    """
+    Список, первые страницы которого загружаются в кэш
+    """
+    service: CachedElasticPaginated
+    # параметры запроса списка: прогреваются значения по умолчанию, как у запроса без параметров
+    query_params: Type[GetMultiQueryParam] = GetMultiQueryParam
+    # количество страниц (None - все страницы)
+    pages: Optional[int] = None
+
+
+class CacheWarmer:
+    """
+    Прогрев кэша сервисов при запуске приложения.
+
+    Первые страницы списков запрашиваются через обычный get_multi сервисов (то есть попадают и в Redis,
+    и в локальный кэш процесса) с ограниченным числом одновременных запросов. Приложение считается готовым
+    (ready) после завершения прогрева или по истечении timeout_seconds.
+
+    После прогрева раз в check_seconds проверяются номера поколений индексов: после переиндексации кэш
+    индекса прогревается повторно.
+    """
+
+    def __init__(
+            self,
+            targets: Callable[[], List[WarmupTarget]],
+            enabled: bool = True,
+            concurrency: int = 4,
+            timeout_seconds: float = 60.0,
+            check_seconds: float = 0.0,
+    ):
+        """
+        :param targets: функция, возвращающая прогреваемые списки (вызывается при запуске, когда подключения
+            к хранилищам уже созданы)
+        :param enabled: выполнять ли прогрев (если нет - приложение сразу считается готовым)
+        :param concurrency: максимальное количество одновременных запросов
+        :param timeout_seconds: время, после которого приложение считается готовым, даже если прогрев не завершён
+        :param check_seconds: период проверки номеров поколений индексов (0 - не проверять)
+        """
+        self.targets = targets
+        self.enabled = enabled
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self.check_seconds = check_seconds
+        self.ready = False
+        self._generations: Dict[str, int] = {}
+        self._task: Optional[asyncio.Future] = None
+
+    def start(self) -> None:
+        """Запуск прогрева в фоне"""
+        if not self.enabled:
+            self.ready = True
+            return
+
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except (asyncio.CancelledError, Exception):
+            # ошибка фоновой задачи уже не важна при остановке и не должна мешать закрыть подключения
+            pass
+
+    async def warm(self, targets: List[WarmupTarget]) -> None:
+        """
+        Загрузка первых страниц списков в кэш
+
+        :param targets: прогреваемые списки
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._warm_target(i, semaphore) for i in targets))
+
+    async def _run(self) -> None:
+        targets = []
+        try:
+            targets = self.targets()
+            await asyncio.wait_for(self.warm(targets), self.timeout_seconds)
+        except asyncio.TimeoutError:
+            logger.warning('Прогрев кэша не завершён за %s с', self.timeout_seconds)
+        except Exception as e:
+            logger.warning('Не удалось прогреть кэш: %r', e)
+        finally:
+            self.ready = True
+
+        if not self.check_seconds:
+            return
+
+        while True:
+            await asyncio.sleep(self.check_seconds)
+            try:
+                await self.warm([i for i in targets if await self._is_outdated(i)])
+            except Exception as e:
+                logger.warning('Не удалось проверить поколения индексов для прогрева кэша: %r', e)
+
+    async def _is_outdated(self, target: WarmupTarget) -> bool:
+        return await target.service.get_generation() != self._generations.get(target.service.index)
+
+    async def _warm_target(self, target: WarmupTarget, semaphore: asyncio.Semaphore) -> None:
+        try:
+            generation = await target.service.get_generation()
+        except Exception as e:
+            # остальные списки прогреваются, этот - при следующей проверке поколений
+            logger.warning('Не удалось получить поколение индекса %s для прогрева: %r', target.service.index, e)
+            return
+
+        page_info = await self._warm_page(target, 1, semaphore)
+        if page_info is None:
+            return
+
+        rows_per_page = target.query_params.defaults().rows_per_page
+        pages = math.ceil(page_info.rows_number / rows_per_page) if rows_per_page and page_info.rows_number else 1
+        if target.pages is not None:
+            pages = min(pages, target.pages)
+
+        await asyncio.gather(*(self._warm_page(target, i, semaphore) for i in range(2, pages + 1)))
+        self._generations[target.service.index] = generation
+
+    async def _warm_page(self, target: WarmupTarget, page: int, semaphore: asyncio.Semaphore) -> Optional[PageInfo]:
+        async with semaphore:
+            try:
+                _, page_info = await target.service.get_multi(target.query_params.defaults(page=page))
+            except Exception as e:
+                logger.warning('Не удалось прогреть страницу %s индекса %s: %r', page, target.service.index, e)
+                return None
+
+        return page_info
+
+
+def _default_targets() -> List[WarmupTarget]:
+    # сервисы создаются с теми же аргументами, что и в зависимостях роутеров, - прогревается их локальный кэш
+    redis, es = get_redis(), elastic.es
+
+    return [
+        WarmupTarget(get_film_service(redis=redis, elastic=es), GetMultiQueryParamFilms, envs.warmup.pages),
+        WarmupTarget(get_genre_service(redis=redis, elastic=es)),
+        WarmupTarget(get_person_service(redis=redis, elastic=es), pages=envs.warmup.pages),
+    ]
+
+
+@lru_cache
+def get_cache_warmer() -> CacheWarmer:
+    return CacheWarmer(
+        _default_targets,
+        enabled=envs.warmup.enabled,
+        concurrency=envs.warmup.concurrency,
+        timeout_seconds=envs.warmup.timeout_seconds,
+        check_seconds=envs.warmup.check_seconds,
+    )
@@ -0,0 +1,65 @@
+from itertools import cycle, islice
+from typing import Any, Callable, Dict, List
+
+from core.constants import ElasticIndexes
+from db.redis import RedisCache
+from models.core import GetMultiQueryParam
+from models.films import FilmBase, FilmFull, FilmList
+from models.params import Filters, FilterValue, Search, SearchValue
+from models.persons import PersonBase
+from services.films import FilmElasticService
+from services.response_cache import ResponseCache
+
+Case = Callable[[], Any]
+
+
+def repeat(docs: List[dict], size: int) -> List[dict]:
+    return list(islice(cycle(docs), size))
+
+
+def build_cases(testdata: Dict[str, List[dict]]) -> Dict[str, Case]:
+    """
+    Замеряемые операции горячего пути обработки запроса (без сетевых вызовов)
+
+    :param testdata: документы индексов
+    :return: словарь вида наименование - функция без аргументов
+    """
+    films, persons = testdata['movies'], testdata['persons']
+    service = FilmElasticService(
+        model=FilmBase,
+        index=ElasticIndexes.movies,
+        cache_service=RedisCache(storage=None),
+        db_service=None,
+        expired_data_seconds=600,
+    )
+    redis = RedisCache(storage=None)
+    response_cache = ResponseCache(cache_service=redis, enabled=False)
+
+    query_params = GetMultiQueryParam(
+        page=3, rows_per_page=25, sort_by='imdb_rating', descending=True, with_total=True, cursor=None
+    )
+    search = Search(values=[SearchValue(field='title', value='  Star Wars  ')])
+    filters = Filters(values=[FilterValue(field='genre', value='Action')])
+
+    page = [FilmFull(**i).dict() for i in repeat(films, 25)]
+    encoded_page = redis._encode_json(page)
+
+    cases = {
+        'service.generate_multi_key': lambda: service._generate_multi_key(query_params, FilmBase, 1, search, filters),
+        'service.pack_search_params': lambda: service._pack_search_params(search, filters),
+        'service.pack_get_multi_params': lambda: service._pack_get_multi_params(query_params),
+        'redis.encode_json[25]': lambda: redis._encode_json(page),
+        'redis.decode_json[25]': lambda: redis._decode_json(encoded_page),
+        'model.film_base': lambda: FilmBase(**films[0]),
+        'model.film_full': lambda: FilmFull(**films[0]),
+        'model.person_base': lambda: PersonBase(**persons[0]),
+    }
+
+    for size in (25, 100):
+        film_list = FilmList(
+            rows_per_page=size, page=1, rows_number=1000, has_next=True, next_cursor=None,
+            data=[FilmBase(**i) for i in repeat(films, size)], sort_by='imdb_rating', descending=True,
+        )
+        cases[f'response.film_list[{size}]'] = lambda value=film_list: response_cache._encode(value, FilmList)
+
+    return cases
@@ -0,0 +1,121 @@
+"""
+Микро-бенчмарки горячего пути обработки запроса: формирование ключей кэша и запросов к Elasticsearch,
+(де)сериализация данных кэша, сборка pydantic-моделей и сериализация ответа.
+
+Каждая операция выполняется сериями, результат - минимальное по сериям время одной операции (наименее
+подверженное шуму). Результаты сравниваются с базовыми (baseline.json): если операция стала медленнее
+больше чем на --threshold, скрипт завершается с кодом 1.
+
+Базовые значения зависят от машины - после изменения окружения их нужно пересохранить:
+    python tests/benchmarks/run.py --save
+
+Сравнение с базовыми значениями (из корня репозитория):
+    python tests/benchmarks/run.py
+"""
+import argparse
+import os
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+import orjson
+
+ROOT = Path(__file__).resolve().parents[2]
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# в tests/functional есть свой пакет core, поэтому этот каталог нужен в sys.path только на время импорта testdata
+sys.path.insert(0, str(ROOT / 'tests' / 'functional'))
+from testdata.common import testdata  # noqa: E402
+
+sys.path[0] = str(ROOT / 'src')
+os.environ.setdefault('EXTERNAL_AUTH', 'http://auth.invalid/')
+
+from cases import build_cases  # noqa: E402
+
+
+def calibrate(case, min_seconds: float) -> int:
+    """
+    Количество выполнений операции в одной серии
+
+    :param case: замеряемая функция
+    :param min_seconds: минимальная длительность серии
+    :return: количество выполнений
+    """
+    number, elapsed = timeit.Timer(case).autorange()
+
+    return max(number, int(number * min_seconds / elapsed))
+
+
+def measure(cases: dict, repeat: int, min_seconds: float) -> dict:
+    """
+    Время одной операции.
+
+    Серии разных операций чередуются, чтобы кратковременный шум (другие процессы, частота процессора)
+    не приходился целиком на одну операцию.
+
+    :param cases: замеряемые функции
+    :param repeat: количество серий
+    :param min_seconds: минимальная длительность серии
+    :return: минимальное по сериям время одной операции в наносекундах
+    """
+    timers = {name: (timeit.Timer(case), calibrate(case, min_seconds)) for name, case in cases.items()}
+    results = {name: float('inf') for name in cases}
+    for _ in range(repeat):
+        for name, (timer, number) in timers.items():
+            results[name] = min(results[name], timer.timeit(number) / number * 1e9)
+
+    return results
+
+
+def main(args: argparse.Namespace) -> int:
+    cases = build_cases(testdata)
+    if args.filter:
+        cases = {name: case for name, case in cases.items() if args.filter in name}
+
+    baseline = orjson.loads(BASELINE.read_bytes())['cases'] if BASELINE.exists() and not args.save else {}
+    regressions = []
+
+    results = measure(cases, args.repeat, args.min_seconds)
+
+    print(f'{"case":36} {"ns/op":>12} {"baseline":>12} {"change":>8}')
+    for name in cases:
+        base = baseline.get(name)
+        change = results[name] / base - 1 if base else None
+        if change is not None and change > args.threshold:
+            regressions.append(name)
+
+        print(
+            f'{name:36} {results[name]:>12.0f} {base or 0:>12.0f} '
+            f'{f"{change:+.1%}" if change is not None else "-":>8}{" !" if name in regressions else ""}'
+        )
+
+    if args.save:
+        BASELINE.write_bytes(orjson.dumps(
+            {'machine': f'{platform.python_implementation()} {platform.python_version()} {platform.machine()}',
+             'cases': {name: round(value, 1) for name, value in results.items()}},
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS,
+        ) + b'\n')
+        print(f'\nБазовые значения сохранены в {BASELINE}')
+        return 0
+
+    if regressions:
+        print(f'\nЗамедление больше {args.threshold:.0%}: {", ".join(regressions)}')
+        return 1
+
+    return 0
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Микро-бенчмарки горячего пути обработки запроса')
+    parser.add_argument('--save', action='store_true', help='сохранить результаты как базовые')
+    parser.add_argument('--threshold', type=float, default=0.25, help='допустимое замедление (0.25 = 25%%)')
+    parser.add_argument('--repeat', type=int, default=7, help='количество серий')
+    parser.add_argument('--min-seconds', type=float, default=0.2, help='минимальная длительность серии')
+    parser.add_argument('--filter', help='запускать только операции, содержащие подстроку')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    sys.exit(main(parse_args()))
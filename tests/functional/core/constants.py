@@ -3,6 +3,7 @@ import enum
 
 class RequestMethods(str, enum.Enum):
     get = 'GET'
+    post = 'POST'
 
 
 class ApiRoutes(str, enum.Enum):
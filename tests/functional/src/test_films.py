@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from typing import Any, List, Optional
 
+import orjson
 import pytest
 from pydantic import BaseModel
 from testdata.films import films
@@ -8,6 +9,7 @@ from utils.redis import clear_cache
 from utils.requests import api_request, default_query_params
 
 from core.constants import ApiRoutes, RequestMethods
+from core.settings import test_settings
 
 
 class DataTestExpected(BaseModel):
@@ -160,3 +162,67 @@ async def test_get_films_by_search(request_client, redis_client, elastic_data, s
     if objects_count > 0:
         assert data[index_of_film_in_result].get('id') == search_data.expected.value.get('id')
 
+
+@pytest.mark.asyncio
+async def test_get_films_without_total(request_client, elastic_data):
+    response, data = await api_request(
+        request_client,
+        RequestMethods.get,
+        ApiRoutes.films,
+        with_check=False,
+        query_params={**default_query_params, 'page[size]': len(films) - 1, 'page[total]': 'false'}
+    )
+
+    assert response.status == HTTPStatus.OK
+    assert data.get('rows_number') is None
+    assert data.get('has_next') is True
+    assert len(data.get('data')) == len(films) - 1
+
+
+@pytest.mark.asyncio
+async def test_get_films_by_cursor(request_client, elastic_data):
+    query_params = {**default_query_params, 'page[size]': 7}
+    film_ids = []
+
+    while True:
+        response, data = await api_request(
+            request_client,
+            RequestMethods.get,
+            ApiRoutes.films,
+            query_params=query_params
+        )
+        film_ids.extend(i.get('id') for i in data.get('data'))
+
+        if not data.get('next_cursor'):
+            break
+        query_params = {**query_params, 'page[cursor]': data.get('next_cursor')}
+
+    assert len(film_ids) == len(set(film_ids)) == len(films)
+
+
+@pytest.mark.asyncio
+async def test_export_films(request_client, elastic_data):
+    async with request_client.get(
+            f'http://{test_settings.api.host}:{test_settings.api.port}/v1/{ApiRoutes.films.value}/export',
+            headers={'Authorization': f'Bearer {test_settings.api.token}'}
+    ) as response:
+        assert response.status == HTTPStatus.OK
+        lines = [orjson.loads(line) async for line in response.content if line.strip()]
+
+    assert len(lines) == len(films)
+    assert {i.get('id') for i in lines} == {i.get('id') for i in films}
+
+
+@pytest.mark.asyncio
+async def test_get_films_batch(request_client, elastic_data):
+    film_ids = [i.get('id') for i in films[:3]]
+
+    response, data = await api_request(
+        request_client,
+        RequestMethods.post,
+        ApiRoutes.films,
+        route_detail='batch',
+        json={'ids': [*film_ids, 'some_id']}
+    )
+
+    assert [i.get('id') for i in data] == film_ids
@@ -87,6 +87,23 @@ async def test_search_genre_by_name(elastic_data, request_client):
     assert data.get('data')[0]['name'] == 'Animation', 'Incorrect genre search by name'
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize('query,names', [
+    ('show', ['Game-Show', 'Talk-Show']),
+    ('sci', ['Sci-Fi']),
+])
+async def test_search_genre_by_hyphenated_name(elastic_data, request_client, query, names):
+    response, data = await api_request(
+        request_client,
+        RequestMethods.get,
+        ApiRoutes.genres,
+        route_detail='search',
+        query_params={'query': query},
+    )
+
+    assert sorted(i['name'] for i in data['data']) == names, 'Incorrect genre search by part of hyphenated name'
+
+
 @pytest.mark.asyncio
 async def test_search_not_existed_genre(elastic_data, request_client):
     genre_name = 'No name'
@@ -118,4 +135,24 @@ async def test_get_not_existed_id(elastic_data, request_client):
     assert data['detail'] == f'Объект с идентификатором {genre_id} не найден', 'Incorrect get genre by not existed id'
 
 
+@pytest.mark.asyncio
+async def test_genres_not_modified(elastic_data, request_client):
+    response, data = await api_request(
+        request_client,
+        RequestMethods.get,
+        ApiRoutes.genres,
+        query_params=default_query_params,
+    )
+    etag = response.headers['ETag']
+
+    response, data = await api_request(
+        request_client,
+        RequestMethods.get,
+        ApiRoutes.genres,
+        query_params=default_query_params,
+        with_check=False,
+        headers={'If-None-Match': etag},
+    )
 
+    assert response.status == HTTPStatus.NOT_MODIFIED, 'Incorrect response on matching If-None-Match'
+    assert response.headers['ETag'] == etag, 'Incorrect ETag of not modified response'
@@ -1,5 +1,5 @@
 from http import HTTPStatus
-from typing import Optional, Tuple
+from typing import Any, Optional, Tuple
 
 from aiohttp import ClientResponse
 
@@ -20,18 +20,21 @@ async def api_request(
         route: ApiRoutes,
         route_detail: str = '',
         query_params: Optional[dict] = None,
-        with_check: bool = True
+        with_check: bool = True,
+        json: Optional[Any] = None,
+        headers: Optional[dict] = None
 ) -> Tuple[ClientResponse, dict]:
     async with request_client.request(
             method=method,
             url=f'http://{test_settings.api.host}:{test_settings.api.port}/v1/{route}/{route_detail}',
             params=query_params,
-            headers={'Authorization': f'Bearer {test_settings.api.token}'}
+            json=json,
+            headers={'Authorization': f'Bearer {test_settings.api.token}', **(headers or {})}
     ) as response:
 
         if with_check:
             assert response.status == HTTPStatus.OK
 
-        data = await response.json()
+        data = await response.json() if response.status != HTTPStatus.NOT_MODIFIED else {}
 
         return response, data
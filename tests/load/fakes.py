@@ -0,0 +1,19 @@
+import asyncio
+import random
+from typing import Optional
+
+
+class Latency:
+    """
+    Искусственная задержка сетевого вызова: базовое значение плюс равномерно распределённый разброс
+    """
+
+    def __init__(self, base_ms: float = 0.0, jitter_ms: float = 0.0, seed: Optional[int] = None):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+
+    async def wait(self) -> None:
+        delay = self.base_ms + self.random.uniform(0, self.jitter_ms) if self.jitter_ms else self.base_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
@@ -0,0 +1,241 @@
+"""
+Нагрузочное тестирование API без внешних сервисов.
+
+Приложение (main:app) запускается в том же процессе поверх хранилищ Elasticsearch и Redis в памяти
+(db.memory_elastic, db.memory_redis) с настраиваемой задержкой и разбросом, заполненных данными
+из tests/functional/testdata.
+Запросы к эндпоинтам фильмов, жанров и персон выполняются напрямую через ASGI, без сети.
+
+Сценарии:
+    cold - кэши пусты, каждый уникальный запрос выполняется один раз (все запросы - промахи кэша);
+    warm - те же запросы после прогрева кэша, пока не будет выполнено --requests запросов.
+
+Запуск из корня репозитория:
+    python tests/load/run.py --requests 5000 --concurrency 50 --es-latency 5 --es-jitter 5 --redis-latency 0.5
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import random
+import secrets
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Tuple
+from urllib.parse import quote
+
+import orjson
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# в tests/functional есть свой пакет core, поэтому этот каталог нужен в sys.path только на время импорта testdata
+sys.path.insert(0, str(ROOT / 'tests' / 'functional'))
+from testdata.common import testdata  # noqa: E402
+
+sys.path[0] = str(ROOT / 'src')
+
+JWT_SECRET = secrets.token_hex(16)
+os.environ.setdefault('EXTERNAL_AUTH', 'http://auth.invalid/')
+os.environ['EXTERNAL_AUTH_LOCAL_VERIFICATION'] = 'true'
+os.environ['EXTERNAL_AUTH_JWT_SECRET'] = JWT_SECRET
+
+from db.memory_elastic import MemoryElasticBackend  # noqa: E402
+from db.memory_redis import MemoryRedis  # noqa: E402
+from fakes import Latency  # noqa: E402
+
+
+class Result(NamedTuple):
+    group: str
+    status: int
+    seconds: float
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def create_token() -> str:
+    header = b64url(orjson.dumps({'alg': 'HS256', 'typ': 'JWT'}))
+    payload = b64url(orjson.dumps({'role_name': 'user', 'exp': int(time.time()) + 3600}))
+    signature = hmac.new(JWT_SECRET.encode(), f'{header}.{payload}'.encode(), hashlib.sha256).digest()
+
+    return f'{header}.{payload}.{b64url(signature)}'
+
+
+def build_workload(seed: int) -> List[Tuple[str, str]]:
+    """
+    Уникальные запросы к API: списки (разные страницы, размеры и сортировки), поиск и объекты по ID
+
+    :param seed: начальное значение генератора случайных чисел
+    :return: список пар (группа эндпоинтов, путь с параметрами)
+    """
+    rnd = random.Random(seed)
+
+    workload = []
+    for route, index, field in (('films', 'movies', 'title'), ('genres', 'genres', 'name'),
+                                ('persons', 'persons', 'name')):
+        docs = testdata[index]
+        for size in (10, 25, 50):
+            for page in range(1, max(len(docs) // size, 1) + 1):
+                workload.append((route, f'/v1/{route}?page[number]={page}&page[size]={size}'))
+        workload.append((route, f'/v1/{route}?page[size]=25&descending=true&page[total]=false'))
+        queries = sorted({w for i in docs for w in str(i.get(field) or '').split() if len(w) > 3})
+        queries = rnd.sample(queries, min(10, len(queries)))
+        workload += [(route, f'/v1/{route}/search?query={quote(i)}') for i in queries]
+        workload += [(route, f'/v1/{route}/{i["id"]}') for i in docs]
+
+    rnd.shuffle(workload)
+
+    return workload
+
+
+async def call(app, path: str, headers: List[Tuple[bytes, bytes]]) -> int:
+    """
+    Выполнение GET-запроса к ASGI-приложению без сети
+
+    :return: код ответа
+    """
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': headers,
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+    status = 0
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+
+    return status
+
+
+async def run_scenario(app, requests: List[Tuple[str, str]], concurrency: int) -> Tuple[List[Result], float]:
+    """
+    Выполнение запросов заданным количеством параллельных клиентов
+
+    :return: результаты запросов и общее время выполнения
+    """
+    headers = [(b'authorization', f'Bearer {create_token()}'.encode())]
+    queue = iter(requests)
+    results = []
+
+    async def worker():
+        for group, path in queue:
+            started = time.perf_counter()
+            status = await call(app, path, headers)
+            results.append(Result(group, status, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return results, time.perf_counter() - started
+
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+
+    return values[min(len(values) - 1, max(0, int(round(q / 100 * len(values) + 0.5)) - 1))]
+
+
+def report(name: str, results: List[Result], elapsed: float) -> dict:
+    groups: Dict[str, List[Result]] = defaultdict(list)
+    for i in results:
+        groups['all'].append(i)
+        groups[i.group].append(i)
+
+    rows = {}
+    for group, items in groups.items():
+        latencies = [i.seconds * 1000 for i in items]
+        rows[group] = {
+            'requests': len(items),
+            'errors': sum(not 200 <= i.status < 400 for i in items),
+            'rps': len(items) / elapsed if group == 'all' else None,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+
+    print(f'\n{name}: {len(results)} запросов за {elapsed:.2f} с ({len(results) / elapsed:.0f} запросов/с)')
+    print(f'{"":10} {"requests":>9} {"errors":>7} {"p50, мс":>9} {"p95, мс":>9} {"p99, мс":>9}')
+    for group, row in rows.items():
+        print(
+            f'{group:10} {row["requests"]:>9} {row["errors"]:>7} '
+            f'{row["p50_ms"]:>9.2f} {row["p95_ms"]:>9.2f} {row["p99_ms"]:>9.2f}'
+        )
+
+    return {'elapsed_seconds': elapsed, 'groups': rows}
+
+
+def reset_caches(redis: MemoryRedis) -> None:
+    from services.films import get_film_service
+    from services.genres import get_genre_service
+    from services.persons import get_person_service
+    from services.response_cache import get_response_cache
+
+    redis.data.clear()
+    # сервисы создаются один раз на процесс - пересоздаём их вместе с локальными кэшами
+    for factory in (get_film_service, get_genre_service, get_person_service, get_response_cache):
+        factory.cache_clear()
+
+
+async def main(args: argparse.Namespace) -> dict:
+    import main as application
+    from db import elastic, redis
+
+    memory_redis = MemoryRedis(delay=Latency(args.redis_latency, args.redis_jitter, seed=args.seed).wait)
+    redis.redis = memory_redis
+    elastic.es = MemoryElasticBackend(testdata, delay=Latency(args.es_latency, args.es_jitter, seed=args.seed).wait)
+
+    workload = build_workload(args.seed)
+    reset_caches(memory_redis)
+
+    results = {}
+    cold, elapsed = await run_scenario(application.app, workload, args.concurrency)
+    results['cold'] = report('cold', cold, elapsed)
+
+    warm_requests = (workload * (args.requests // len(workload) + 1))[:args.requests]
+    warm, elapsed = await run_scenario(application.app, warm_requests, args.concurrency)
+    results['warm'] = report('warm', warm, elapsed)
+
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Нагрузочное тестирование API без внешних сервисов')
+    parser.add_argument('--requests', type=int, default=5000, help='количество запросов в сценарии warm')
+    parser.add_argument('--concurrency', type=int, default=50, help='количество параллельных клиентов')
+    parser.add_argument('--es-latency', type=float, default=5.0, help='задержка Elasticsearch, мс')
+    parser.add_argument('--es-jitter', type=float, default=5.0, help='разброс задержки Elasticsearch, мс')
+    parser.add_argument('--redis-latency', type=float, default=0.5, help='задержка Redis, мс')
+    parser.add_argument('--redis-jitter', type=float, default=0.5, help='разброс задержки Redis, мс')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=Path, help='файл для сохранения результатов в JSON')
+
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    arguments = parse_args()
+    summary = asyncio.run(main(arguments))
+    if arguments.output:
+        arguments.output.write_bytes(orjson.dumps({'args': vars(arguments) | {'output': None}, **summary}))
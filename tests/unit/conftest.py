@@ -0,0 +1,48 @@
+"""
+Тесты без внешних сервисов: приложение импортируется из src, Elasticsearch и Redis - в памяти процесса
+(db.memory_elastic, db.memory_redis).
+
+Запуск из корня репозитория:
+    python -m pytest tests/unit
+"""
+import os
+import sys
+import uuid
+from pathlib import Path
+from typing import List
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[2]
+
+# в tests/functional есть свой пакет core, поэтому src должен быть первым в sys.path
+sys.path.insert(0, str(ROOT / 'src'))
+os.environ.setdefault('EXTERNAL_AUTH', 'http://auth.invalid/')
+
+from core.constants import ElasticIndexes  # noqa: E402
+from db.memory_elastic import MemoryElasticBackend  # noqa: E402
+from db.memory_redis import MemoryRedis  # noqa: E402
+from tests.unit.utils import RequestCounter  # noqa: E402
+
+
+@pytest.fixture
+def genres() -> List[dict]:
+    return [
+        {'id': str(uuid.UUID(int=i, version=4)), 'name': f'Genre {i}', 'description': f'Description of genre {i}'}
+        for i in range(1, 61)
+    ]
+
+
+@pytest.fixture
+def es_requests() -> RequestCounter:
+    return RequestCounter()
+
+
+@pytest.fixture
+def elastic(genres, es_requests) -> MemoryElasticBackend:
+    return MemoryElasticBackend({ElasticIndexes.genres.value: genres}, delay=es_requests)
+
+
+@pytest.fixture
+def redis() -> MemoryRedis:
+    return MemoryRedis()
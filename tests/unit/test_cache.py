@@ -0,0 +1,71 @@
+import pytest
+
+from core.config import envs
+from core.constants import ElasticIndexes
+from db.generations import IndexGenerations
+from db.memory import MemoryCache
+from db.redis import RedisCache
+from models.core import GetMultiQueryParam
+from models.genres import GenreBase
+from models.params import Search, SearchValue
+from services.genres import GenreElasticService
+
+
+@pytest.fixture
+def service(elastic, redis) -> GenreElasticService:
+    return GenreElasticService(
+        model=GenreBase,
+        index=ElasticIndexes.genres,
+        cache_service=RedisCache(redis),
+        db_service=elastic,
+        expired_data_seconds=300,
+        generations=IndexGenerations(redis, check_seconds=0),
+        trusted_source=False,
+        local_cache=MemoryCache(max_size=100, ttl_seconds=300),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_skip_validation(service, genres, es_requests, monkeypatch):
+    _id = genres[0]['id']
+    results, page_info = await service.get_multi(GetMultiQueryParam.defaults())
+    obj = await service.get(_id)
+    requests = es_requests.count
+
+    # чтение из Redis, а не из локального кэша; валидация модели завершится ошибкой
+    service.invalidate_local()
+    monkeypatch.setattr(GenreBase, '__init__', lambda *args, **kwargs: pytest.fail('Cache hit must not validate'))
+
+    cached_results, cached_page_info = await service.get_multi(GetMultiQueryParam.defaults())
+    assert [i.json() for i in cached_results] == [i.json() for i in results]
+    assert cached_page_info == page_info
+    assert (await service.get(_id)).json() == obj.json()
+    assert [i.json() for i in await service.get_many([_id])] == [obj.json()]
+    assert es_requests.count == requests
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('page,size,has_next', [(1, 25, True), (2, 25, False), (4, 10, True), (5, 10, False)])
+async def test_count_free_pages_within_max_result_window(service, monkeypatch, page, size, has_next):
+    monkeypatch.setattr(envs.elastic, 'max_result_window', 50)
+    query_params = GetMultiQueryParam.defaults(page=page, rows_per_page=size, with_total=False)
+
+    params = service._pack_get_multi_params(query_params)
+    results, page_info = await service.get_multi(query_params)
+
+    assert params['from'] + params['size'] <= envs.elastic.max_result_window
+    assert len(results) == size
+    assert page_info.has_next is has_next
+
+
+@pytest.mark.asyncio
+async def test_empty_page_is_not_cached(service, redis, es_requests):
+    search = Search(values=[SearchValue(field='name', value='unknown')])
+
+    for _ in range(2):
+        results, page_info = await service.get_multi(GetMultiQueryParam.defaults(), search)
+        assert results == []
+
+    assert not service.local_cache._data, 'Empty page must not be stored in the local cache'
+    assert not redis.data, 'Empty page must not be stored in Redis'
+    assert es_requests.count == 2
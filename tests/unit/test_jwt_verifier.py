@@ -0,0 +1,256 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+import aiohttp
+import orjson
+import pytest
+
+from core.exceptions import NotAuthorized, TokenVerificationUnavailable
+from db.memory_redis import MemoryRedis
+from db.redis import RedisCache
+from services.auth import AuthService
+from services.jwt_verifier import RSA_DIGEST_INFO_PREFIXES, JwtVerifier
+
+SECRET = 'secret'
+JWKS_URL = 'http://auth.invalid/jwks'
+USER = {'role_name': 'user'}
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def is_prime(n: int, rnd: random.Random) -> bool:
+    if n % 2 == 0:
+        return n == 2
+
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+
+    for _ in range(20):
+        x = pow(rnd.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def generate_rsa_key(seed: int, bits: int = 1024) -> Tuple[int, int, int]:
+    """
+    RSA-ключ для подписи тестовых токенов
+
+    :return: модуль, открытая и закрытая экспоненты
+    """
+    rnd, e = random.Random(seed), 65537
+    primes = []
+    while len(primes) < 2:
+        candidate = rnd.getrandbits(bits // 2) | (1 << (bits // 2 - 1)) | 1
+        if is_prime(candidate, rnd) and math.gcd(e, candidate - 1) == 1:
+            primes.append(candidate)
+
+    p, q = primes
+
+    return p * q, e, pow(e, -1, (p - 1) * (q - 1))
+
+
+RSA_KEY = generate_rsa_key(1)
+OTHER_RSA_KEY = generate_rsa_key(2)
+
+
+def jwk(kid: str, key: Tuple[int, int, int]) -> dict:
+    n, e, _ = key
+    return {
+        'kty': 'RSA',
+        'kid': kid,
+        'n': b64url(n.to_bytes((n.bit_length() + 7) // 8, 'big')),
+        'e': b64url(e.to_bytes((e.bit_length() + 7) // 8, 'big')),
+    }
+
+
+def create_token(payload: dict, algorithm: str = 'HS256', kid: Optional[str] = None, key=RSA_KEY) -> str:
+    header = {'alg': algorithm, 'typ': 'JWT', **({'kid': kid} if kid else {})}
+    signing_input = f'{b64url(orjson.dumps(header))}.{b64url(orjson.dumps(payload))}'
+    if algorithm == 'HS256':
+        signature = hmac.new(SECRET.encode(), signing_input.encode(), hashlib.sha256).digest()
+    else:
+        n, _, d = key
+        key_length = (n.bit_length() + 7) // 8
+        digest_info = RSA_DIGEST_INFO_PREFIXES['sha256'] + hashlib.sha256(signing_input.encode()).digest()
+        message = b'\x00\x01' + b'\xff' * (key_length - len(digest_info) - 3) + b'\x00' + digest_info
+        signature = pow(int.from_bytes(message, 'big'), d, n).to_bytes(key_length, 'big')
+
+    return f'{signing_input}.{b64url(signature)}'
+
+
+class FakeResponse:
+    def __init__(self, result, status: int = 200):
+        self.result = result
+        self.status = status
+
+    async def __aenter__(self) -> 'FakeResponse':
+        if isinstance(self.result, BaseException):
+            raise self.result
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        pass
+
+    def raise_for_status(self) -> None:
+        pass
+
+    async def json(self, loads=None):
+        return self.result
+
+
+class FakeHttpClient:
+    """
+    Сервис авторизации: GET - JWKS, POST - проверка токена
+    """
+
+    def __init__(self, jwks):
+        self.jwks = jwks
+        self.jwks_requests = 0
+        self.auth_requests = 0
+
+    def get(self, url: str) -> FakeResponse:
+        self.jwks_requests += 1
+        return FakeResponse(self.jwks)
+
+    def post(self, url: str, json: dict) -> FakeResponse:
+        self.auth_requests += 1
+        return FakeResponse(USER)
+
+
+def create_verifier(http_client: FakeHttpClient, **kwargs) -> JwtVerifier:
+    return JwtVerifier(http_client=http_client, secret=SECRET, jwks_url=JWKS_URL, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('algorithm,kid', [('HS256', None), ('RS256', 'key-1')])
+async def test_verify_token(algorithm, kid):
+    http_client = FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]})
+    verifier = create_verifier(http_client)
+    payload = {**USER, 'exp': int(time.time()) + 3600}
+
+    assert await verifier.verify(create_token(payload, algorithm, kid)) == payload
+    assert http_client.jwks_requests == (1 if algorithm == 'RS256' else 0), 'JWKS must be fetched only for RS*'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('algorithm,kid', [('HS256', None), ('RS256', 'key-1')])
+async def test_verify_tampered_signature(algorithm, kid):
+    verifier = create_verifier(FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]}))
+    header, _, signature = create_token(USER, algorithm, kid).split('.')
+    payload = b64url(orjson.dumps({'role_name': 'admin'}))
+
+    with pytest.raises(NotAuthorized):
+        await verifier.verify(f'{header}.{payload}.{signature}')
+
+
+@pytest.mark.asyncio
+async def test_verify_signature_of_other_key():
+    verifier = create_verifier(FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]}))
+
+    with pytest.raises(NotAuthorized):
+        await verifier.verify(create_token(USER, 'RS256', 'key-1', key=OTHER_RSA_KEY))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('claims,valid', [
+    ({'exp': -3600}, False),
+    ({'exp': -10}, True),
+    ({'exp': -60}, False),
+    ({'nbf': 10}, True),
+    ({'nbf': 60}, False),
+    ({'exp': 'never'}, False),
+])
+async def test_verify_claims_with_leeway(claims, valid):
+    verifier = create_verifier(FakeHttpClient({'keys': []}), leeway_seconds=30)
+    now = time.time()
+    token = create_token({**USER, **{k: now + v if isinstance(v, int) else v for k, v in claims.items()}})
+
+    if valid:
+        assert await verifier.verify(token)
+    else:
+        with pytest.raises(NotAuthorized):
+            await verifier.verify(token)
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_falls_back_to_remote():
+    http_client = FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]})
+    service = AuthService(
+        http_client=http_client,
+        cache_service=RedisCache(MemoryRedis()),
+        url='http://auth.invalid/verify',
+        cache_seconds=60,
+        verifier=create_verifier(http_client),
+    )
+
+    result = await service.validate(create_token(USER, 'RS256', 'key-2', key=OTHER_RSA_KEY))
+
+    assert result.role_name == USER['role_name']
+    assert http_client.jwks_requests == 1
+    assert http_client.auth_requests == 1, 'Token with unknown key must be verified by the auth service'
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refreshes_jwks():
+    http_client = FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]})
+    verifier = create_verifier(http_client)
+    await verifier.verify(create_token(USER, 'RS256', 'key-1'))
+
+    # ключи ротированы, но JWKS перечитывается не чаще JWKS_MIN_REFRESH_SECONDS
+    http_client.jwks = {'keys': [jwk('key-1', RSA_KEY), jwk('key-2', OTHER_RSA_KEY)]}
+    token = create_token(USER, 'RS256', 'key-2', key=OTHER_RSA_KEY)
+    with pytest.raises(TokenVerificationUnavailable):
+        await verifier.verify(token)
+
+    verifier._keys_fetched_at -= verifier.JWKS_MIN_REFRESH_SECONDS + 1
+    assert await verifier.verify(token) == USER
+    assert http_client.jwks_requests == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('jwks', [
+    aiohttp.ClientConnectionError(),
+    asyncio.TimeoutError(),
+    ['not', 'a', 'dict'],
+    {'keys': [{'kty': 'RSA', 'kid': 'key-1', 'n': 12345, 'e': 'AQAB'}]},
+])
+async def test_jwks_failure_without_cached_keys(jwks):
+    verifier = create_verifier(FakeHttpClient(jwks))
+
+    with pytest.raises(TokenVerificationUnavailable):
+        await verifier.verify(create_token(USER, 'RS256', 'key-1'))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('jwks', [aiohttp.ClientConnectionError(), asyncio.TimeoutError(), ['not', 'a', 'dict']])
+async def test_jwks_failure_with_cached_keys(jwks):
+    http_client = FakeHttpClient({'keys': [jwk('key-1', RSA_KEY)]})
+    verifier = create_verifier(http_client, jwks_cache_seconds=0)
+    token = create_token(USER, 'RS256', 'key-1')
+    await verifier.verify(token)
+
+    http_client.jwks = jwks
+    verifier._keys_fetched_at -= verifier.JWKS_MIN_REFRESH_SECONDS + 1
+
+    assert await verifier.verify(token) == USER, 'Cached keys must be used while JWKS is unavailable'
+    assert http_client.jwks_requests == 2
+    # после неудачной попытки JWKS не запрашивается повторно до истечения JWKS_MIN_REFRESH_SECONDS
+    assert await verifier.verify(token) == USER
+    assert http_client.jwks_requests == 2
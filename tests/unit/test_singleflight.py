@@ -0,0 +1,71 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from core.constants import ElasticIndexes
+from db.generations import IndexGenerations
+from db.redis import RedisCache
+from models.core import GetMultiQueryParam
+from models.genres import GenreBase
+from models.params import Search, SearchValue
+from services.genres import GenreElasticService
+from services.singleflight import RedisLockSingleFlight
+
+
+@pytest.fixture
+def workers(elastic, redis, es_requests):
+    """Сервисы двух процессов с общим Redis (локальные кэши и объединение запросов в процессе - свои)"""
+    es_requests.seconds = 0.2
+
+    return [
+        GenreElasticService(
+            model=GenreBase,
+            index=ElasticIndexes.genres,
+            cache_service=RedisCache(redis),
+            db_service=elastic,
+            expired_data_seconds=300,
+            generations=IndexGenerations(redis, check_seconds=0),
+            single_flight=RedisLockSingleFlight(redis, lock_timeout_ms=3000, poll_interval_ms=10),
+        )
+        for _ in range(2)
+    ]
+
+
+async def run_concurrently(requests) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*requests, return_exceptions=True)
+
+    return time.perf_counter() - started
+
+
+@pytest.mark.asyncio
+async def test_wait_for_cached_result(workers, es_requests):
+    elapsed = await run_concurrently(i.get_multi(GetMultiQueryParam.defaults()) for i in workers)
+
+    assert elapsed < 1
+    # count и search выполняет только процесс, захвативший блокировку
+    assert es_requests.count == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_result_does_not_wait_for_lock_timeout(workers):
+    search = Search(values=[SearchValue(field='name', value='unknown')])
+
+    elapsed = await run_concurrently(i.get_multi(GetMultiQueryParam.defaults(), search) for i in workers)
+
+    assert elapsed < 1, 'Worker must load at once when the lock is released with nothing cached'
+
+
+@pytest.mark.asyncio
+async def test_not_found_does_not_wait_for_lock_timeout(workers):
+    _id = str(uuid.uuid4())
+
+    elapsed = await run_concurrently(i.get(_id) for i in workers)
+
+    assert elapsed < 1, 'Worker must load at once when the lock is released with nothing cached'
+    for i in workers:
+        with pytest.raises(HTTPException):
+            await i.get(_id)
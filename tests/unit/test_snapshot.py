@@ -0,0 +1,186 @@
+import asyncio
+import uuid
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from core.constants import ElasticIndexes
+from db.generations import IndexGenerations
+from db.memory_elastic import MemoryElasticBackend
+from db.redis import RedisCache
+from models.core import GetMultiQueryParam
+from models.genres import GenreBase
+from models.params import Search, SearchValue
+from services.genres import GenreElasticService, GenreSnapshotService
+from tests.unit.utils import wait_for
+
+
+def create_snapshot_service(elastic, redis, **kwargs) -> GenreSnapshotService:
+    return GenreSnapshotService(
+        model=GenreBase,
+        index=ElasticIndexes.genres,
+        db_service=elastic,
+        generations=IndexGenerations(redis, check_seconds=0),
+        expired_data_seconds=300,
+        **kwargs
+    )
+
+
+@pytest.fixture
+def cached_service(genres, redis) -> GenreElasticService:
+    return GenreElasticService(
+        model=GenreBase,
+        index=ElasticIndexes.genres,
+        cache_service=RedisCache(redis),
+        db_service=MemoryElasticBackend({ElasticIndexes.genres.value: genres}),
+        expired_data_seconds=300,
+        generations=IndexGenerations(redis, check_seconds=0),
+    )
+
+
+def new_genre(i: int) -> dict:
+    return {'id': str(uuid.UUID(int=1000 + i, version=4)), 'name': f'New genre {i}'}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('query_params,search', [
+    ({}, None),
+    ({'page': 3}, None),
+    ({'page': 4}, None),
+    ({'rows_per_page': 0}, None),
+    ({'rows_per_page': 7, 'descending': True}, None),
+    ({'sort_by': 'name', 'with_total': False}, None),
+    ({}, 'genre 12'),
+    ({'rows_per_page': 5}, 'unknown'),
+])
+async def test_get_multi_matches_cached_service(elastic, redis, cached_service, query_params, search):
+    service = create_snapshot_service(elastic, redis, check_seconds=0)
+    query_params = GetMultiQueryParam.defaults(**query_params)
+    search = Search(values=[SearchValue(field='name', value=search)]) if search else None
+
+    assert await service.get_multi(query_params, search) == await cached_service.get_multi(query_params, search)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('query,names', [
+    ('show', ['Game-Show', 'Talk-Show']),
+    ('Sci', ['Sci-Fi']),
+    ('sci-fi', ['Sci-Fi']),
+    ('noir drama', ['Drama', 'Film-Noir']),
+    ('gameshow', []),
+])
+async def test_search_hyphenated_names(redis, query, names):
+    # результаты - как у Elasticsearch: standard analyzer разделяет слова по дефисам
+    genres = [
+        {'id': str(uuid.UUID(int=i, version=4)), 'name': name}
+        for i, name in enumerate(['Drama', 'Film-Noir', 'Game-Show', 'Sci-Fi', 'Talk-Show'], start=1)
+    ]
+    service = create_snapshot_service(
+        MemoryElasticBackend({ElasticIndexes.genres.value: genres}), redis, check_seconds=0
+    )
+    search = Search(values=[SearchValue(field='name', value=query)])
+
+    results, page_info = await service.get_multi(GetMultiQueryParam.defaults(), search)
+
+    assert sorted(i.name for i in results) == names
+    assert page_info.rows_number == len(names)
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_match_cached_service(elastic, redis, cached_service):
+    service = create_snapshot_service(elastic, redis, check_seconds=0)
+    query_params = GetMultiQueryParam.defaults(rows_per_page=25, with_total=False)
+
+    while True:
+        results, page_info = await service.get_multi(query_params)
+        assert (results, page_info) == await cached_service.get_multi(query_params)
+        if not page_info.next_cursor:
+            break
+        query_params = GetMultiQueryParam.defaults(rows_per_page=25, with_total=False, cursor=page_info.next_cursor)
+
+
+@pytest.mark.asyncio
+async def test_get_matches_cached_service(elastic, redis, cached_service, genres):
+    service = create_snapshot_service(elastic, redis, check_seconds=0)
+    ids = [genres[0]['id'], str(uuid.uuid4()), genres[-1]['id']]
+
+    for i in (ids[0], ids[2]):
+        assert await service.get(i) == await cached_service.get(i)
+    for i in (service, cached_service):
+        with pytest.raises(HTTPException) as e:
+            await i.get(ids[1])
+        assert e.value.status_code == HTTPStatus.NOT_FOUND
+    # модели из кэша собираются без валидации - сравнивается то, что получит клиент
+    assert [i.json() for i in await service.get_many(ids)] == [i.json() for i in await cached_service.get_many(ids)]
+
+
+@pytest.mark.asyncio
+async def test_reads_from_snapshot(elastic, redis, es_requests):
+    service = create_snapshot_service(elastic, redis, check_seconds=0)
+
+    await service.get_multi(GetMultiQueryParam.defaults())
+    requests = es_requests.count
+    assert requests > 0
+
+    await service.get_multi(GetMultiQueryParam.defaults(page=2))
+    await service.get_multi(GetMultiQueryParam.defaults(), Search(values=[SearchValue(field='name', value='genre')]))
+    assert es_requests.count == requests, 'Snapshot must not query Elasticsearch after loading'
+
+
+@pytest.mark.asyncio
+async def test_reload_after_generation_change(elastic, redis, es_requests):
+    service = create_snapshot_service(elastic, redis, check_seconds=0.02, refresh_seconds=0)
+    assert await service.get_generation() == 0
+
+    elastic.add_documents(service.index, [new_genre(1)])
+    await asyncio.sleep(0.1)
+    assert await service.get_many([new_genre(1)['id']]) == [], 'Snapshot must not be reloaded without generation change'
+
+    # переиндексация в другом процессе
+    await IndexGenerations(redis).bump(service.index)
+    await wait_for(lambda: service.generation == 1)
+
+    assert (await service.get(new_genre(1)['id'])).name == new_genre(1)['name']
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_reload_after_invalidate(elastic, redis):
+    service = create_snapshot_service(elastic, redis, check_seconds=0)
+    await service.get_generation()
+
+    elastic.add_documents(service.index, [new_genre(1)])
+
+    assert await service.invalidate() == 1
+    assert service.generation == 1
+    assert (await service.get(new_genre(1)['id'])).name == new_genre(1)['name']
+
+
+@pytest.mark.asyncio
+async def test_reload_after_refresh_seconds(elastic, redis):
+    service = create_snapshot_service(elastic, redis, check_seconds=0.02, refresh_seconds=0.1)
+    _, page_info = await service.get_multi(GetMultiQueryParam.defaults())
+    loaded_at = service.loaded_at
+
+    elastic.add_documents(service.index, [new_genre(1)])
+    await wait_for(lambda: service.loaded_at != loaded_at)
+
+    _, new_page_info = await service.get_multi(GetMultiQueryParam.defaults())
+    assert new_page_info.rows_number == page_info.rows_number + 1
+    assert service.generation == 0
+    await service.stop()
+
+
+@pytest.mark.asyncio
+async def test_stop(elastic, redis, es_requests):
+    service = create_snapshot_service(elastic, redis, check_seconds=0.01, refresh_seconds=0.01)
+    await service.get_generation()
+    await wait_for(lambda: es_requests.count > 1)
+
+    await service.stop()
+    requests = es_requests.count
+    await asyncio.sleep(0.05)
+
+    assert service._watcher is None
+    assert es_requests.count == requests, 'Snapshot must not be reloaded after stop'
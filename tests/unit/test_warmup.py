@@ -0,0 +1,120 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from api.health import get_readiness
+from core.constants import ElasticIndexes
+from db.generations import IndexGenerations
+from db.redis import RedisCache
+from models.core import GetMultiQueryParam
+from models.genres import GenreBase
+from services.genres import GenreElasticService
+from services.warmup import CacheWarmer, WarmupTarget
+from tests.unit.utils import wait_for
+
+
+@pytest.fixture
+def service(elastic, redis) -> GenreElasticService:
+    return GenreElasticService(
+        model=GenreBase,
+        index=ElasticIndexes.genres,
+        cache_service=RedisCache(redis),
+        db_service=elastic,
+        expired_data_seconds=300,
+        generations=IndexGenerations(redis, check_seconds=0),
+    )
+
+
+async def is_ready(warmer: CacheWarmer) -> bool:
+    response = await get_readiness(warmer)
+    assert response.status_code in (HTTPStatus.OK, HTTPStatus.SERVICE_UNAVAILABLE)
+
+    return response.status_code == HTTPStatus.OK
+
+
+async def assert_cached(service: GenreElasticService, es_requests, pages: int) -> None:
+    requests = es_requests.count
+    for page in range(1, pages + 1):
+        await service.get_multi(GetMultiQueryParam.defaults(page=page))
+
+    assert es_requests.count == requests, 'Warmed pages must be served from cache'
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warmup(service, es_requests):
+    es_requests.seconds = 0.05
+    warmer = CacheWarmer(lambda: [WarmupTarget(service)], timeout_seconds=10)
+
+    assert not await is_ready(warmer)
+    warmer.start()
+    assert not await is_ready(warmer), 'Application must not be ready until warm-up is done'
+
+    await wait_for(lambda: warmer.ready)
+    assert await is_ready(warmer)
+    await warmer.stop()
+
+    await assert_cached(service, es_requests, pages=3)
+
+
+@pytest.mark.asyncio
+async def test_ready_after_timeout(service, es_requests):
+    es_requests.seconds = 60
+    warmer = CacheWarmer(lambda: [WarmupTarget(service)], timeout_seconds=0.1)
+
+    warmer.start()
+    assert not await is_ready(warmer)
+
+    await wait_for(lambda: warmer.ready, timeout_seconds=1)
+    assert await is_ready(warmer)
+    await warmer.stop()
+
+
+@pytest.mark.asyncio
+async def test_ready_after_failure():
+    def targets():
+        raise ConnectionError('Elasticsearch is unavailable')
+
+    warmer = CacheWarmer(targets, check_seconds=0.01)
+
+    warmer.start()
+    await wait_for(lambda: warmer.ready)
+    assert await is_ready(warmer)
+    await warmer.stop()
+
+
+@pytest.mark.asyncio
+async def test_ready_when_disabled():
+    warmer = CacheWarmer(lambda: [], enabled=False)
+
+    warmer.start()
+    assert await is_ready(warmer)
+    await warmer.stop()
+
+
+@pytest.mark.asyncio
+async def test_rewarm_after_generation_bump(service, es_requests, redis):
+    warmer = CacheWarmer(lambda: [WarmupTarget(service, pages=2)], check_seconds=0.02)
+    warmer.start()
+    await wait_for(lambda: warmer.ready)
+    await assert_cached(service, es_requests, pages=2)
+
+    # переиндексация в другом процессе: сменилось поколение индекса, локальный кэш этого процесса не сброшен
+    await IndexGenerations(redis).bump(service.index)
+    await wait_for(lambda: warmer._generations.get(service.index) == 1)
+    await warmer.stop()
+
+    await assert_cached(service, es_requests, pages=2)
+
+
+@pytest.mark.asyncio
+async def test_no_rewarm_without_generation_bump(service, es_requests):
+    warmer = CacheWarmer(lambda: [WarmupTarget(service)], check_seconds=0.02)
+    warmer.start()
+    await wait_for(lambda: warmer.ready)
+    requests = es_requests.count
+
+    await asyncio.sleep(0.1)
+    await warmer.stop()
+
+    assert es_requests.count == requests
@@ -0,0 +1,25 @@
+import asyncio
+from typing import Callable
+
+
+class RequestCounter:
+    """
+    Задержка запросов к хранилищу в памяти, подсчитывающая эти запросы
+    """
+
+    def __init__(self, seconds: float = 0.0):
+        self.seconds = seconds
+        self.count = 0
+
+    async def __call__(self) -> None:
+        self.count += 1
+        await asyncio.sleep(self.seconds)
+
+
+async def wait_for(condition: Callable[[], bool], timeout_seconds: float = 2.0) -> None:
+    """Ожидание результата фоновых задач: условие проверяется, пока не выполнится или не истечёт таймаут"""
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(wait(), timeout_seconds)